@@ -4,7 +4,11 @@ The complete code of Ch. 5, Recipe 1 --
 Implementing a simple stack
 """
 
+import sys
+import tracemalloc
+
 from random import randint
+from time import perf_counter
 
 def print_line(
     leader:str, line:(str,None)=None, 
@@ -102,3 +106,848 @@ except Exception as error:
         'my_stack[4:5] = ', '%s: %s' % 
         (error.__class__.__name__, error)
     )
+
+# - Using an array to store a stack of numbers compactly: every 
+#   member has the same type (set by typecode), and is stored as a 
+#   raw C-value instead of a Python object
+
+from array import array
+
+class typed_stack:
+    """
+Provides a stack of numeric values of a single type, stored in an 
+array.array. Space for capacity members can be allocated up-front, 
+and values can be pushed and popped in batches.
+"""
+    def __init__(self, typecode, values=(), capacity=0):
+        self.data = array(typecode)
+        # - self.data may be longer than the stack, if space was 
+        #   preallocated, or if values have been popped: only the 
+        #   first self._size members are part of the stack
+        self._size = 0
+        if capacity:
+            self.data.frombytes(bytes(capacity * self.data.itemsize))
+        self.push_many(values)
+
+    @property
+    def typecode(self):
+        return self.data.typecode
+
+    @property
+    def capacity(self):
+        return len(self.data)
+
+    def __len__(self):
+        return self._size
+
+    def __iter__(self):
+        return iter(self.data[:self._size])
+
+    def __repr__(self):
+        return '%s(%r, %s)' % (
+            self.__class__.__name__, self.typecode, 
+            self.data[:self._size].tolist()
+        )
+
+    def push(self, value):
+        if self._size < len(self.data):
+            self.data[self._size] = value
+        else:
+            self.data.append(value)
+        self._size += 1
+
+    def push_many(self, values):
+        if not isinstance(values, array) or \
+            values.typecode != self.typecode:
+            values = array(self.typecode, values)
+        end = self._size + len(values)
+        # - Slice-assignment grows self.data if it's too short
+        self.data[self._size:end] = values
+        self._size = end
+
+    def pop(self):
+        if not self._size:
+            raise IndexError(
+                'pop from empty %s' % self.__class__.__name__
+            )
+        self._size -= 1
+        return self.data[self._size]
+
+    def pop_many(self, count:int):
+        """
+Pops count values, returning them in an array in the order that 
+they would have been popped one at a time (most recent first)
+"""
+        if count < 0:
+            raise ValueError(
+                '%s.pop_many expects a count of 0 or more, but was '
+                'passed %s' % (self.__class__.__name__, count)
+            )
+        if count > self._size:
+            raise IndexError(
+                'cannot pop %d values from a %s of %d' % 
+                (count, self.__class__.__name__, self._size)
+            )
+        start = self._size - count
+        result = self.data[start:self._size]
+        result.reverse()
+        self._size = start
+        return result
+
+    def sort(self, *args, **kwargs):
+        raise AttributeError(
+            '%s instances are not sortable' % 
+            self.__class__.__name__
+        )
+
+    def __setitem__(self, *args, **kwargs):
+        raise RuntimeError(
+            '%s instances cannot be altered except by '
+            'using push' % 
+            self.__class__.__name__
+        )
+
+def benchmark_typed_stack(size=1000000):
+    """
+Compares the memory used by, and push/pop throughput of, stack and 
+typed_stack instances
+"""
+    print('Stack benchmark (%d values)' % size)
+    values = list(range(size))
+    for name, factory in (
+        ('stack', stack), 
+        ('typed_stack', lambda: typed_stack('q')), 
+        (
+            'typed_stack (capacity)', 
+            lambda: typed_stack('q', capacity=size)
+        ), 
+    ):
+        tracemalloc.start()
+        my_stack = factory()
+        for value in range(size):
+            my_stack.push(value)
+        allocated = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+        del my_stack
+        my_stack = factory()
+        start = perf_counter()
+        for value in values:
+            my_stack.push(value)
+        pushed = perf_counter() - start
+        start = perf_counter()
+        while len(my_stack):
+            my_stack.pop()
+        popped = perf_counter() - start
+        print_line(
+            name, 'push %11.0f/sec, pop %11.0f/sec, %5.1f bytes/value' 
+            % (size / pushed, size / popped, allocated / size), 1
+        )
+    my_stack = typed_stack('q', capacity=size)
+    batch = array('q', range(1000))
+    start = perf_counter()
+    for i in range(size // 1000):
+        my_stack.push_many(batch)
+    pushed = perf_counter() - start
+    start = perf_counter()
+    for i in range(size // 1000):
+        my_stack.pop_many(1000)
+    popped = perf_counter() - start
+    print_line(
+        'typed_stack (batches)', 'push %11.0f/sec, pop %11.0f/sec' 
+        % (size / pushed, size / popped), 1
+    )
+
+my_stack = typed_stack('i', [1,2,3], capacity=10)
+print_line('my_stack (typed)', repr(my_stack))
+my_stack.push_many(range(4,8))
+print_line('my_stack (push_many)', repr(my_stack))
+print_line('my_stack.pop_many(3)', str(my_stack.pop_many(3)), 1)
+print_line('my_stack (after pop_many)', repr(my_stack))
+try:
+    my_stack.push(1.5)
+except Exception as error:
+    print_line(
+        'my_stack.push(1.5)', '%s: %s' % 
+        (error.__class__.__name__, error)
+    )
+
+# - Sharing a stack between threads (or asyncio tasks): pushes and 
+#   pops are synchronized, and a capacity can be set, so that 
+#   producers wait (or give up) when the stack is full, and 
+#   consumers wait when it's empty
+
+import asyncio
+import threading
+
+from copy import deepcopy
+from queue import Empty, Full, LifoQueue
+
+# - Changing the members of a concurrent or asyncio stack any other 
+#   way than with push or pop would bypass its lock, its capacity, 
+#   and the notification of waiting consumers, so the other UserList 
+#   mutators are all blocked
+
+def _push_and_pop_only(self, *args, **kwargs):
+    raise RuntimeError(
+        '%s instances cannot be altered except by '
+        'using push and pop' % 
+        self.__class__.__name__
+    )
+
+def _check_capacity(self, initlist, capacity:int):
+    if capacity > 0 and initlist != None and len(initlist) > capacity:
+        raise ValueError(
+            '%s was passed %d initial values, more than its '
+            'capacity of %d' % 
+            (self.__class__.__name__, len(initlist), capacity)
+        )
+
+# - The UserList methods that return a new instance (copy, slicing, 
+#   + and *) would otherwise create one with no capacity, and 
+#   copy.copy would share the original's lock and conditions, so 
+#   they all create a new stack, of the same capacity, from a copy 
+#   of the values, which raises ValueError if there are too many
+
+def _with_capacity(self, values):
+    return self.__class__(values, self.capacity)
+
+def _copy_with_capacity(self):
+    return _with_capacity(self, self.data[:])
+
+def _deepcopy_with_capacity(self, memo):
+    return _with_capacity(self, deepcopy(self.data, memo))
+
+def _getitem_with_capacity(self, index):
+    if isinstance(index, slice):
+        return _with_capacity(self, self.data[index])
+    return self.data[index]
+
+def _add_with_capacity(self, other):
+    if isinstance(other, UserList):
+        other = other.data
+    return _with_capacity(self, self.data + list(other))
+
+def _radd_with_capacity(self, other):
+    if isinstance(other, UserList):
+        other = other.data
+    return _with_capacity(self, list(other) + self.data)
+
+def _mul_with_capacity(self, count):
+    return _with_capacity(self, self.data * count)
+
+class concurrent_stack(stack):
+    """
+Provides a thread-safe stack, with an optional capacity (0 means 
+unbounded). push and pop block until there is room (or a value), 
+unless block is False or the timeout (in seconds) expires, in which 
+case queue.Full or queue.Empty is raised.
+"""
+    def __init__(self, initlist=None, capacity=0):
+        _check_capacity(self, initlist, capacity)
+        stack.__init__(self, initlist)
+        self.capacity = capacity
+        self._lock = threading.Lock()
+        self._not_full = threading.Condition(self._lock)
+        self._not_empty = threading.Condition(self._lock)
+
+    def _full(self):
+        return self.capacity > 0 and len(self.data) >= self.capacity
+
+    def __len__(self):
+        with self._lock:
+            return len(self.data)
+
+    def push(self, value, block=True, timeout=None):
+        with self._not_full:
+            if self._full():
+                if not block or not self._not_full.wait_for(
+                    lambda: not self._full(), timeout
+                ):
+                    raise Full
+            self.data.append(value)
+            self._not_empty.notify()
+
+    def pop(self, block=True, timeout=None):
+        with self._not_empty:
+            if not self.data:
+                if not block or not self._not_empty.wait_for(
+                    lambda: self.data, timeout
+                ):
+                    raise Empty
+            value = self.data.pop()
+            self._not_full.notify()
+            return value
+
+    append = extend = insert = remove = clear = reverse = \
+        _push_and_pop_only
+    __delitem__ = __iadd__ = __imul__ = _push_and_pop_only
+    copy = __copy__ = _copy_with_capacity
+    __deepcopy__ = _deepcopy_with_capacity
+    __getitem__ = _getitem_with_capacity
+    __add__ = _add_with_capacity
+    __radd__ = _radd_with_capacity
+    __mul__ = __rmul__ = _mul_with_capacity
+
+class async_stack(stack):
+    """
+Provides a stack for sharing between asyncio tasks, with an optional 
+capacity (0 means unbounded). push and pop are coroutines that wait 
+until there is room (or a value): wrap them in asyncio.wait_for to 
+wait with a timeout.
+"""
+    def __init__(self, initlist=None, capacity=0):
+        _check_capacity(self, initlist, capacity)
+        stack.__init__(self, initlist)
+        self.capacity = capacity
+        self._lock = asyncio.Lock()
+        self._not_full = asyncio.Condition(self._lock)
+        self._not_empty = asyncio.Condition(self._lock)
+
+    def _full(self):
+        return self.capacity > 0 and len(self.data) >= self.capacity
+
+    async def push(self, value):
+        async with self._not_full:
+            await self._not_full.wait_for(lambda: not self._full())
+            self.data.append(value)
+            self._not_empty.notify()
+
+    async def pop(self):
+        async with self._not_empty:
+            await self._not_empty.wait_for(lambda: self.data)
+            value = self.data.pop()
+            self._not_full.notify()
+            return value
+
+    append = extend = insert = remove = clear = reverse = \
+        _push_and_pop_only
+    __delitem__ = __iadd__ = __imul__ = _push_and_pop_only
+    copy = __copy__ = _copy_with_capacity
+    __deepcopy__ = _deepcopy_with_capacity
+    __getitem__ = _getitem_with_capacity
+    __add__ = _add_with_capacity
+    __radd__ = _radd_with_capacity
+    __mul__ = __rmul__ = _mul_with_capacity
+
+def benchmark_concurrent_stack(
+    total=200000, thread_counts=(1, 4, 16), capacity=1000
+):
+    """
+Measures push/pop throughput of concurrent_stack and queue.LifoQueue 
+with the same number of producer and consumer threads, sharing 
+total values between them
+"""
+    print('Concurrent stack benchmark (%d values)' % total)
+    for name, factory, push, pop in (
+        (
+            'concurrent_stack', 
+            lambda: concurrent_stack(capacity=capacity), 
+            concurrent_stack.push, concurrent_stack.pop
+        ), 
+        (
+            'LifoQueue', lambda: LifoQueue(maxsize=capacity), 
+            LifoQueue.put, LifoQueue.get
+        ), 
+    ):
+        for thread_count in thread_counts:
+            my_stack = factory()
+            count = total // thread_count
+
+            def producer():
+                for value in range(count):
+                    push(my_stack, value)
+
+            def consumer():
+                for value in range(count):
+                    pop(my_stack)
+
+            threads = [
+                threading.Thread(target=target) 
+                for i in range(thread_count) 
+                for target in (producer, consumer)
+            ]
+            start = perf_counter()
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+            elapsed = perf_counter() - start
+            print_line(
+                '%s x%d' % (name, thread_count), 
+                '%11.0f values/sec' % 
+                (count * thread_count / elapsed), 1, 32
+            )
+
+my_stack = concurrent_stack([1,2], capacity=3)
+my_stack.push(3)
+print_line('my_stack (concurrent)', str(my_stack))
+try:
+    my_stack.push(4, timeout=0.1)
+except Full as error:
+    print_line('my_stack.push(4)', '%s (timed out)' % (
+        error.__class__.__name__
+    ))
+worker = threading.Thread(target=lambda: my_stack.push(4))
+worker.start()
+print_line('value (popped)', str(my_stack.pop()), 1)
+worker.join()
+print_line('my_stack (thread push)', str(my_stack))
+
+async def async_stack_demo():
+    my_stack = async_stack(capacity=2)
+    async def producer():
+        for value in range(5):
+            await my_stack.push(value)
+    producer_task = asyncio.ensure_future(producer())
+    for i in range(5):
+        print_line('value (awaited pop)', str(await my_stack.pop()), 1)
+    await producer_task
+
+asyncio.run(async_stack_demo())
+
+# - Keeping track of the smallest and largest members as values are 
+#   pushed, so that they don't have to be found by scanning the 
+#   whole stack every time
+
+class minmax_stack(stack):
+    """
+Provides a stack that can report its smallest and largest members, 
+and its top member, in O(1). Two auxiliary stacks hold only the 
+values that were a new minimum (or maximum) when they were pushed, 
+and are popped along with those values.
+"""
+    def __init__(self, initlist=None):
+        stack.__init__(self)
+        self._minimums = []
+        self._maximums = []
+        if initlist != None:
+            for value in initlist:
+                self.push(value)
+
+    def push(self, value):
+        self.data.append(value)
+        if not self._minimums or value <= self._minimums[-1]:
+            self._minimums.append(value)
+        if not self._maximums or value >= self._maximums[-1]:
+            self._maximums.append(value)
+
+    def pop(self):
+        value = self.data.pop()
+        if value == self._minimums[-1]:
+            self._minimums.pop()
+        if value == self._maximums[-1]:
+            self._maximums.pop()
+        return value
+
+    def _empty_error(self, name):
+        return ValueError(
+            '%s() of empty %s' % (name, self.__class__.__name__)
+        )
+
+    def min(self):
+        if not self._minimums:
+            raise self._empty_error('min')
+        return self._minimums[-1]
+
+    def max(self):
+        if not self._maximums:
+            raise self._empty_error('max')
+        return self._maximums[-1]
+
+    def top(self):
+        if not self.data:
+            raise self._empty_error('top')
+        return self.data[-1]
+
+    # - Any other way of changing the members would leave the 
+    #   auxiliary stacks out of step, so they are all blocked, 
+    #   just like __setitem__
+    def _push_only(self, *args, **kwargs):
+        raise RuntimeError(
+            '%s instances cannot be altered except by '
+            'using push' % 
+            self.__class__.__name__
+        )
+
+    append = extend = insert = remove = clear = reverse = _push_only
+    __delitem__ = __iadd__ = __imul__ = _push_only
+
+my_stack = minmax_stack([5,3,8])
+print_line('my_stack (min/max)', str(my_stack))
+for value in (1, 9, 4):
+    my_stack.push(value)
+    print_line(
+        'pushed %s' % value, 'min=%s, max=%s, top=%s' % 
+        (my_stack.min(), my_stack.max(), my_stack.top()), 1
+    )
+while len(my_stack) > 1:
+    value = my_stack.pop()
+    print_line(
+        'popped %s' % value, 'min=%s, max=%s, top=%s' % 
+        (my_stack.min(), my_stack.max(), my_stack.top()), 1
+    )
+try:
+    my_stack.append(23)
+except Exception as error:
+    print_line(
+        'my_stack.append', '%s: %s' % 
+        (error.__class__.__name__, error)
+    )
+
+# - A persistent stack never changes: push and pop return a new 
+#   version of the stack, which shares all of its unchanged frames 
+#   with the version it came from, so keeping a snapshot of any 
+#   version costs nothing extra
+
+class persistent_stack:
+    """
+Provides an immutable stack, whose frames are (value, next-frame) 
+tuples. push and pop return new persistent_stack instances in O(1), 
+leaving the original untouched. Iteration starts at the top.
+"""
+    __slots__ = ('_frame', '_size')
+
+    def __init__(self, values=()):
+        frame = None
+        size = 0
+        for value in values:
+            frame = (value, frame)
+            size += 1
+        self._frame = frame
+        self._size = size
+
+    @classmethod
+    def _from_frame(cls, frame, size):
+        result = cls.__new__(cls)
+        result._frame = frame
+        result._size = size
+        return result
+
+    def __len__(self):
+        return self._size
+
+    def __iter__(self):
+        frame = self._frame
+        while frame != None:
+            yield frame[0]
+            frame = frame[1]
+
+    def __repr__(self):
+        # - Shown bottom-to-top, the same way that stack shows them
+        return '%s(%s)' % (
+            self.__class__.__name__, list(reversed(list(self)))
+        )
+
+    def push(self, value):
+        return self._from_frame((value, self._frame), self._size + 1)
+
+    def pop(self):
+        if self._frame == None:
+            raise IndexError(
+                'pop from empty %s' % self.__class__.__name__
+            )
+        return self._from_frame(self._frame[1], self._size - 1)
+
+    def top(self):
+        if self._frame == None:
+            raise IndexError(
+                'top of empty %s' % self.__class__.__name__
+            )
+        return self._frame[0]
+
+def benchmark_snapshots(depth=10000, snapshots=100000, copies=1000):
+    """
+Compares the memory used to keep snapshots of a deep stack by 
+copying a stack, and by keeping versions of a persistent_stack
+"""
+    print('Snapshot benchmark (stack depth %d)' % depth)
+    my_stack = stack(range(depth))
+    tracemalloc.start()
+    start = perf_counter()
+    history = []
+    for value in range(copies):
+        my_stack.push(value)
+        history.append(my_stack.copy())
+    elapsed = perf_counter() - start
+    allocated = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del history
+    print_line(
+        'stack.copy()', '%d snapshots, %9.1f bytes/snapshot, '
+        '%7.2f us/snapshot' % (
+            copies, allocated / copies, elapsed / copies * 1000000
+        ), 1
+    )
+    my_stack = persistent_stack(range(depth))
+    tracemalloc.start()
+    start = perf_counter()
+    history = []
+    for value in range(snapshots):
+        my_stack = my_stack.push(value)
+        history.append(my_stack)
+    elapsed = perf_counter() - start
+    allocated = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    print_line(
+        'persistent_stack', '%d snapshots, %9.1f bytes/snapshot, '
+        '%7.2f us/snapshot' % (
+            snapshots, allocated / snapshots, 
+            elapsed / snapshots * 1000000
+        ), 1
+    )
+
+original = persistent_stack([1,2,3])
+pushed = original.push(4)
+popped = original.pop()
+print_line('original', repr(original))
+print_line('original.push(4)', repr(pushed))
+print_line('original.pop()', repr(popped))
+print_line('popped.top()', str(popped.top()), 1)
+
+# - Spilling a stack to disk when it gets too big: the most recent 
+#   values stay in memory, and older ones are written to 
+#   fixed-size, memory-mapped segment files, to be read back in 
+#   (most recent first) as the in-memory values are popped
+
+import mmap
+import os
+import pickle
+import shutil
+import struct
+import tempfile
+import weakref
+
+class _spill_segment:
+    """
+Keeps track of one memory-mapped segment file of a spilling_stack, 
+and how many bytes of it are in use
+"""
+    __slots__ = ('path', 'buffer', 'used')
+
+    def __init__(self, path, size):
+        self.path = path
+        with open(path, 'w+b') as segment_file:
+            segment_file.truncate(size)
+            self.buffer = mmap.mmap(segment_file.fileno(), size)
+        self.used = 0
+
+    def close(self):
+        self.buffer.close()
+        os.remove(self.path)
+
+def _remove_spill_files(segments:list, directory:str):
+    # - Called by a spilling_stack's close, or by its finalizer if 
+    #   it's garbage-collected without being closed, so it mustn't 
+    #   refer to the stack itself
+    while segments:
+        segments.pop().close()
+    shutil.rmtree(directory, ignore_errors=True)
+
+class spilling_stack:
+    """
+Provides a stack that keeps at most hot_limit values in memory. 
+When there are more, the oldest in-memory values are pickled and 
+written to memory-mapped segment files of segment_size bytes (or, 
+for a value too big for one of those, a segment of its own), in a 
+temporary directory (created in directory, if one is supplied), 
+and read back in when the in-memory values have all been popped. 
+The spilled_* and reloaded_* attributes count the values and bytes 
+written to and read back from the segments.
+"""
+    # - Each record in a segment is a pickled value followed by its 
+    #   length, so that the segment can be read backwards
+    _record_length = struct.Struct('<I')
+
+    def __init__(
+        self, hot_limit=100000, segment_size=16*1024*1024, 
+        directory=None
+    ):
+        if hot_limit < 2:
+            raise ValueError(
+                '%s expects a hot_limit of at least 2, but was '
+                'passed %s' % (self.__class__.__name__, hot_limit)
+            )
+        self.hot_limit = hot_limit
+        self.segment_size = segment_size
+        self.data = []
+        self._directory = tempfile.mkdtemp(
+            prefix='spilling_stack-', dir=directory
+        )
+        self._segments = []
+        self._finalizer = weakref.finalize(
+            self, _remove_spill_files, self._segments, self._directory
+        )
+        self._segment_count = 0
+        self._spilled_length = 0
+        self.spilled_values = 0
+        self.spilled_bytes = 0
+        self.reloaded_values = 0
+        self.reloaded_bytes = 0
+
+    def __len__(self):
+        return len(self.data) + self._spilled_length
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def close(self):
+        """Removes all of the stack's segment files"""
+        self._finalizer()
+        self._spilled_length = 0
+
+    def push(self, value):
+        self.data.append(value)
+        if len(self.data) > self.hot_limit:
+            # - If the spill fails, the value is taken off again, so 
+            #   that a failed push leaves the stack as it was, and 
+            #   can be retried without pushing the value twice
+            try:
+                self._spill()
+            except BaseException:
+                self.data.pop()
+                raise
+
+    def pop(self):
+        if not self.data:
+            if not self._spilled_length:
+                raise IndexError(
+                    'pop from empty %s' % self.__class__.__name__
+                )
+            self._reload()
+        return self.data.pop()
+
+    def _spill(self):
+        # - Spill all but the newest half of the in-memory values
+        count = len(self.data) - self.hot_limit // 2
+        # - Every value is pickled before any is written, and if a 
+        #   write fails, the segments are put back as they were, so 
+        #   that a value that can't be spilled leaves the stack as it 
+        #   was, rather than with some values both spilled and still 
+        #   in memory
+        payloads = [
+            pickle.dumps(value, pickle.HIGHEST_PROTOCOL) 
+            for value in self.data[:count]
+        ]
+        segment_count = len(self._segments)
+        if self._segments:
+            used = self._segments[-1].used
+        spilled_bytes = self.spilled_bytes
+        try:
+            for payload in payloads:
+                self._write(payload)
+        except BaseException:
+            while len(self._segments) > segment_count:
+                self._segments.pop().close()
+            if self._segments:
+                self._segments[-1].used = used
+            self.spilled_bytes = spilled_bytes
+            raise
+        del self.data[:count]
+        self._spilled_length += count
+        self.spilled_values += count
+
+    def _write(self, payload):
+        record_size = len(payload) + self._record_length.size
+        if (
+            not self._segments 
+            or self._segments[-1].used + record_size > self.segment_size
+        ):
+            # - A record too big for a segment_size segment gets a 
+            #   segment of its own, just big enough to hold it, 
+            #   rather than being kept in memory past hot_limit
+            self._segment_count += 1
+            self._segments.append(
+                _spill_segment(
+                    os.path.join(
+                        self._directory, 
+                        'segment-%08d' % self._segment_count
+                    ), 
+                    max(record_size, self.segment_size)
+                )
+            )
+        segment = self._segments[-1]
+        end = segment.used + len(payload)
+        segment.buffer[segment.used:end] = payload
+        self._record_length.pack_into(
+            segment.buffer, end, len(payload)
+        )
+        segment.used += record_size
+        self.spilled_bytes += record_size
+
+    def _reload(self):
+        # - Read back up to half of hot_limit values, newest first, 
+        #   removing segments as they are emptied
+        values = []
+        while len(values) < self.hot_limit // 2 and self._segments:
+            segment = self._segments[-1]
+            end = segment.used - self._record_length.size
+            length, = self._record_length.unpack_from(
+                segment.buffer, end
+            )
+            values.append(
+                pickle.loads(segment.buffer[end - length:end])
+            )
+            segment.used = end - length
+            self.reloaded_bytes += length + self._record_length.size
+            if not segment.used:
+                self._segments.pop().close()
+        values.reverse()
+        self.data = values
+        self._spilled_length -= len(values)
+        self.reloaded_values += len(values)
+
+def benchmark_spilling_stack(size=1000000, hot_limit=100000):
+    """
+Measures push/pop throughput of a spilling_stack that has to spill 
+most of its values
+"""
+    print('Spilling stack benchmark (%d values)' % size)
+    with spilling_stack(hot_limit=hot_limit) as my_stack:
+        start = perf_counter()
+        for value in range(size):
+            my_stack.push(value)
+        pushed = perf_counter() - start
+        start = perf_counter()
+        while len(my_stack):
+            my_stack.pop()
+        popped = perf_counter() - start
+        print_line(
+            'spilling_stack', 'push %11.0f/sec, pop %11.0f/sec' % 
+            (size / pushed, size / popped), 1
+        )
+        print_line(
+            'spilled', '%d values, %d bytes' % 
+            (my_stack.spilled_values, my_stack.spilled_bytes), 1
+        )
+        print_line(
+            'reloaded', '%d values, %d bytes' % 
+            (my_stack.reloaded_values, my_stack.reloaded_bytes), 1
+        )
+
+with spilling_stack(hot_limit=4, segment_size=64) as my_stack:
+    for value in range(10):
+        my_stack.push(value)
+    print_line('my_stack (in memory)', str(my_stack.data))
+    print_line(
+        'my_stack (spilled)', '%d values, %d bytes, %d segments' % (
+            my_stack.spilled_values, my_stack.spilled_bytes, 
+            len(my_stack._segments)
+        )
+    )
+    print_line(
+        'values (popped)', 
+        str([my_stack.pop() for i in range(len(my_stack))]), 1
+    )
+    print_line(
+        'my_stack (reloaded)', '%d values, %d bytes' % 
+        (my_stack.reloaded_values, my_stack.reloaded_bytes)
+    )
+
+if __name__ == '__main__' and '--benchmark' in sys.argv:
+    benchmark_typed_stack()
+    benchmark_concurrent_stack()
+    benchmark_snapshots()
+    benchmark_spilling_stack()
@@ -4,10 +4,19 @@ The complete code of Ch. 5, Recipe 2 --
 Queueing options: Lists and deques
 """
 
+import sys
+
 from collections import deque
 from random import randint
 from time import time
 
+# - With --benchmark, the JSON results are written to stdout (so 
+#   that they can be redirected to a file), and everything else the 
+#   script prints goes to stderr instead
+_results_output = sys.stdout
+if __name__ == '__main__' and '--benchmark' in sys.argv:
+    sys.stdout = sys.stderr
+
 def print_line(
     leader:str, line:(str,None)=None, 
     indent:int=0, body_start:int=28
@@ -68,3 +77,1751 @@ while my_queue:
     print_line('value (popped)', str(value), 1)
     print_line('my_queue (after pop)', str(my_queue), 1)
 
+# - A fixed-capacity queue can keep its members in storage that is 
+#   allocated once, and used as a ring: the head and tail positions 
+#   move around it, rather than members being moved or the storage 
+#   being resized. Numeric members can be kept in a typed array, and 
+#   handed to a consumer in batches.
+
+import threading
+
+from array import array
+from enum import Enum
+from queue import Full
+
+class OverflowPolicy(Enum):
+    """
+What a RingBufferQueue does when a value is appended while it's full
+"""
+    # - Wait until a consumer makes room
+    block = 'block'
+    # - Discard the oldest member to make room
+    drop_oldest = 'drop-oldest'
+    # - Raise queue.Full
+    reject = 'reject'
+
+class RingBufferQueue:
+    """
+Provides a thread-safe, first-in, first-out queue with a fixed 
+capacity, whose members are kept in a preallocated list (or, if a 
+typecode is supplied, an array.array) used as a ring buffer. 
+What happens when a value is appended to a full queue is set by the 
+overflow OverflowPolicy (or its value); dropped counts the members 
+discarded by OverflowPolicy.drop_oldest.
+"""
+    def __init__(self, capacity:int, values=(), typecode=None, 
+        overflow=OverflowPolicy.reject):
+        if capacity < 1:
+            raise ValueError(
+                '%s expects a capacity of at least 1, but was '
+                'passed %s' % (self.__class__.__name__, capacity)
+            )
+        self.capacity = capacity
+        self.typecode = typecode
+        self.overflow = OverflowPolicy(overflow)
+        if typecode == None:
+            self._buffer = [None]*capacity
+        else:
+            self._buffer = array(
+                typecode, bytes(capacity * array(typecode).itemsize)
+            )
+        # - The position of the oldest member, and the number of 
+        #   members
+        self._head = 0
+        self._size = 0
+        self.dropped = 0
+        self._not_full = threading.Condition()
+        for value in values:
+            self.append(value)
+
+    def __len__(self):
+        return self._size
+
+    def __iter__(self):
+        with self._not_full:
+            return iter(self._slice(self._head, self._size))
+
+    def __repr__(self):
+        return '%s(%s, capacity=%d)' % (
+            self.__class__.__name__, list(self), self.capacity
+        )
+
+    def _slice(self, start:int, count:int):
+        # - Returns count members from start as one list (or array), 
+        #   joining the two pieces if they wrap around the ring
+        end = start + count
+        if end <= self.capacity:
+            return self._buffer[start:end]
+        return self._buffer[start:] + self._buffer[:end - self.capacity]
+
+    def append(self, value, timeout=None):
+        """
+Appends a value. When the queue is full and overflow is 
+OverflowPolicy.block, waits for up to timeout seconds (forever if 
+it's None) for room, and raises queue.Full if there is none
+"""
+        with self._not_full:
+            if self._size == self.capacity:
+                if self.overflow is OverflowPolicy.drop_oldest:
+                    # - The value replaces the oldest member in its 
+                    #   slot, and is stored before the oldest member 
+                    #   is dropped, so that a value a typed buffer 
+                    #   refuses leaves the queue as it was
+                    self._buffer[self._head] = value
+                    self._head = (self._head + 1) % self.capacity
+                    self.dropped += 1
+                    return
+                elif (
+                    self.overflow is OverflowPolicy.reject 
+                    or not self._not_full.wait_for(
+                        lambda: self._size < self.capacity, timeout
+                    )
+                ):
+                    raise Full(
+                        '%s is full (capacity %d)' % 
+                        (self.__class__.__name__, self.capacity)
+                    )
+            self._buffer[
+                (self._head + self._size) % self.capacity
+            ] = value
+            self._size += 1
+
+    def popleft(self):
+        with self._not_full:
+            if not self._size:
+                raise IndexError(
+                    'pop from an empty %s' % self.__class__.__name__
+                )
+            value = self._buffer[self._head]
+            if self.typecode == None:
+                # - Drop the reference, so the value can be 
+                #   garbage-collected
+                self._buffer[self._head] = None
+            self._head = (self._head + 1) % self.capacity
+            self._size -= 1
+            self._not_full.notify()
+            return value
+
+    def drain(self, max_items=None):
+        """
+Removes up to max_items members (all of them, if it's None) from 
+the front of the queue, and returns them as a single list (or 
+array, if the queue is typed)
+"""
+        if max_items != None and max_items < 0:
+            raise ValueError(
+                '%s.drain expects a max_items of 0 or more, but was '
+                'passed %s' % (self.__class__.__name__, max_items)
+            )
+        with self._not_full:
+            count = self._size
+            if max_items != None:
+                count = max(0, min(max_items, count))
+            batch = self._slice(self._head, count)
+            if self.typecode == None:
+                end = self._head + count
+                if end <= self.capacity:
+                    self._buffer[self._head:end] = [None]*count
+                else:
+                    self._buffer[self._head:] = \
+                        [None]*(self.capacity - self._head)
+                    self._buffer[:end - self.capacity] = \
+                        [None]*(end - self.capacity)
+            self._head = (self._head + count) % self.capacity
+            self._size -= count
+            self._not_full.notify(count)
+            return batch
+
+my_queue = RingBufferQueue(3, [1,2])
+print_line('my_queue (ring buffer)', repr(my_queue))
+my_queue.append(3)
+print_line('value (popped)', str(my_queue.popleft()), 1)
+my_queue.append(4)
+print_line('my_queue (wrapped)', repr(my_queue))
+try:
+    my_queue.append(5)
+except Full as error:
+    print_line('my_queue.append(5)', '%s: %s' % (
+        error.__class__.__name__, error
+    ))
+my_queue = RingBufferQueue(
+    4, range(6), typecode='d', overflow='drop-oldest'
+)
+print_line('my_queue (drop-oldest)', repr(my_queue))
+print_line('my_queue.dropped', str(my_queue.dropped), 1)
+print_line('my_queue.drain(3)', str(my_queue.drain(3)), 1)
+print_line('my_queue (drained)', repr(my_queue))
+my_queue = RingBufferQueue(1, [1], overflow=OverflowPolicy.block)
+consumer = threading.Timer(0.1, my_queue.popleft)
+consumer.start()
+my_queue.append(2)
+consumer.join()
+print_line('my_queue (unblocked)', repr(my_queue))
+
+# - Sharing a queue between processes: records of a fixed binary 
+#   layout are written into slots in a block of shared memory, so 
+#   they cross from one process to another without being pickled 
+#   and sent through a pipe
+
+import multiprocessing
+import os
+import struct
+
+from multiprocessing import shared_memory
+from queue import Empty
+from time import monotonic, sleep
+
+class SharedMemoryQueue:
+    """
+Provides a single-producer, single-consumer queue of fixed-size 
+records, shared between processes in a block of shared memory. 
+Records are tuples of values packed with record_format (a struct 
+format), into a ring of capacity slots. The producer only ever 
+writes the tail counter, and the consumer only the head counter, 
+each after the slot it covers has been written or read, so no lock 
+is needed between them. Queues can be passed to child processes, 
+and should be closed by every process that uses them; the process 
+that created the shared memory also unlinks it when it closes.
+"""
+    _counter = struct.Struct('Q')
+    # - The head and tail counters are kept on separate cache-lines, 
+    #   ahead of the record slots
+    _head_offset = 0
+    _tail_offset = 64
+    _slots_offset = 128
+
+    def __init__(self, record_format:str, capacity:int):
+        self._record = struct.Struct(record_format)
+        self.capacity = capacity
+        self._memory = shared_memory.SharedMemory(
+            create=True, 
+            size=self._slots_offset + capacity * self._record.size
+        )
+        self._buffer = self._memory.buf
+        self._counter.pack_into(self._buffer, self._head_offset, 0)
+        self._counter.pack_into(self._buffer, self._tail_offset, 0)
+        # - Forked child processes inherit this object as it is, so 
+        #   the creating process is recognised by its process-id, 
+        #   rather than by a flag that they would inherit too
+        self._owner_pid = os.getpid()
+
+    def __getstate__(self):
+        return {
+            'record_format':self._record.format, 
+            'capacity':self.capacity, 'name':self._memory.name
+        }
+
+    def __setstate__(self, state):
+        self._record = struct.Struct(state['record_format'])
+        self.capacity = state['capacity']
+        try:
+            # - Python 3.13+ can attach without the resource-tracker 
+            #   claiming the memory for this process too
+            self._memory = shared_memory.SharedMemory(
+                name=state['name'], track=False
+            )
+        except TypeError:
+            self._memory = shared_memory.SharedMemory(
+                name=state['name']
+            )
+        self._buffer = self._memory.buf
+        self._owner_pid = None
+
+    def close(self):
+        self._buffer = None
+        self._memory.close()
+        if self._owner_pid == os.getpid():
+            self._memory.unlink()
+
+    def __len__(self):
+        return (
+            self._counter.unpack_from(
+                self._buffer, self._tail_offset
+            )[0] 
+            - self._counter.unpack_from(
+                self._buffer, self._head_offset
+            )[0]
+        )
+
+    def put_nowait(self, values):
+        buffer = self._buffer
+        tail, = self._counter.unpack_from(buffer, self._tail_offset)
+        head, = self._counter.unpack_from(buffer, self._head_offset)
+        if tail - head >= self.capacity:
+            raise Full
+        self._record.pack_into(
+            buffer, 
+            self._slots_offset 
+                + (tail % self.capacity) * self._record.size, 
+            *values
+        )
+        self._counter.pack_into(buffer, self._tail_offset, tail + 1)
+
+    def get_nowait(self):
+        buffer = self._buffer
+        head, = self._counter.unpack_from(buffer, self._head_offset)
+        tail, = self._counter.unpack_from(buffer, self._tail_offset)
+        if head == tail:
+            raise Empty
+        values = self._record.unpack_from(
+            buffer, 
+            self._slots_offset 
+                + (head % self.capacity) * self._record.size
+        )
+        self._counter.pack_into(buffer, self._head_offset, head + 1)
+        return values
+
+    def _retry(self, operation, exception, timeout):
+        # - There is nothing to wait on across processes, so poll, 
+        #   backing off from yielding the CPU to sleeping for 1ms
+        deadline = None if timeout == None else monotonic() + timeout
+        delay = 0
+        while True:
+            try:
+                return operation()
+            except exception:
+                if deadline != None and monotonic() >= deadline:
+                    raise
+                sleep(delay)
+                delay = min(delay * 2 or 0.00001, 0.001)
+
+    def put(self, values, timeout=None):
+        """
+Puts a record, waiting for up to timeout seconds (forever if it's 
+None) for a free slot, and raising queue.Full if there isn't one
+"""
+        return self._retry(
+            lambda: self.put_nowait(values), Full, timeout
+        )
+
+    def get(self, timeout=None):
+        """
+Gets a record, waiting for up to timeout seconds (forever if it's 
+None) for one to arrive, and raising queue.Empty if none does
+"""
+        return self._retry(self.get_nowait, Empty, timeout)
+
+class SharedMemoryMPMCQueue(SharedMemoryQueue):
+    """
+Provides a multiple-producer, multiple-consumer version of 
+SharedMemoryQueue: producers take turns through one lock, and 
+consumers through another, so each side still behaves like a single 
+producer (or consumer). If the processes using the queue are started 
+from a particular multiprocessing context, the same context has to 
+be supplied, so that the locks match it.
+"""
+    def __init__(self, record_format:str, capacity:int, context=None):
+        SharedMemoryQueue.__init__(self, record_format, capacity)
+        if context == None:
+            context = multiprocessing.get_context()
+        self._put_lock = context.Lock()
+        self._get_lock = context.Lock()
+
+    def __getstate__(self):
+        state = SharedMemoryQueue.__getstate__(self)
+        state['put_lock'] = self._put_lock
+        state['get_lock'] = self._get_lock
+        return state
+
+    def __setstate__(self, state):
+        SharedMemoryQueue.__setstate__(self, state)
+        self._put_lock = state['put_lock']
+        self._get_lock = state['get_lock']
+
+    def put_nowait(self, values):
+        with self._put_lock:
+            return SharedMemoryQueue.put_nowait(self, values)
+
+    def get_nowait(self):
+        with self._get_lock:
+            return SharedMemoryQueue.get_nowait(self)
+
+my_queue = SharedMemoryQueue('qd', 2)
+my_queue.put((1, 0.5))
+my_queue.put_nowait((2, 1.5))
+try:
+    my_queue.put((3, 2.5), timeout=0.01)
+except Full as error:
+    print_line('my_queue.put((3, 2.5))', '%s (timed out)' % (
+        error.__class__.__name__
+    ))
+print_line('record (got)', str(my_queue.get()), 1)
+print_line('record (got)', str(my_queue.get()), 1)
+my_queue.close()
+
+# - Making a queue survive restarts: records are appended to 
+#   segment files on disk, which are synced in batches ("group 
+#   commits") rather than after every record, and the position that 
+#   has been read up to is checkpointed so that reading can resume 
+#   from there
+
+import shutil
+import tempfile
+import zlib
+
+class DurableQueue:
+    """
+Provides a persistent first-in, first-out queue of bytes records, 
+kept in directory. Records are appended, each with its length and 
+CRC, to segment files of about segment_size bytes; appended records 
+are flushed and fsync'd together every sync_interval seconds (or 
+when sync is called), along with a checkpoint of the read position. 
+Segments are deleted once they have been read. When a queue is 
+re-opened, any partly-written record at the end of the last segment 
+is discarded, and reading resumes from the checkpoint, so records 
+that were read but not yet checkpointed are delivered again. If a 
+background sync fails, the error is kept in sync_error.
+"""
+    _header = struct.Struct('<II')
+
+    def __init__(self, directory, segment_size=64*1024*1024, 
+        sync_interval=0.05):
+        self.directory = directory
+        self.segment_size = segment_size
+        self.sync_interval = sync_interval
+        os.makedirs(directory, exist_ok=True)
+        self._lock = threading.Lock()
+        self._not_empty = threading.Condition(self._lock)
+        # - fsyncs and checkpoint-writes are serialized by a lock of 
+        #   their own, so that puts and gets don't wait on them, and 
+        #   the last checkpoint written is kept, so that an older 
+        #   read position never replaces a newer one
+        self._checkpoint_lock = threading.Lock()
+        self._checkpointed = None
+        self.sync_error = None
+        segments = self._segment_numbers()
+        if not segments:
+            segments = [0]
+        # - Only the last segment can have been cut off part-way 
+        #   through a record
+        self._write_segment = segments[-1]
+        self._written = self._recover(self._write_segment)
+        self._writer = open(
+            self._segment_path(self._write_segment), 'ab'
+        )
+        self._flushed = self._written
+        self._dirty = False
+        self._read_segment, self._read_offset = self._load_checkpoint(
+            segments
+        )
+        self._reader = open(
+            self._segment_path(self._read_segment), 'rb'
+        )
+        self._reader.seek(self._read_offset)
+        self._closed = threading.Event()
+        self._syncer = threading.Thread(target=self._sync_loop)
+        self._syncer.daemon = True
+        self._syncer.start()
+
+    def _segment_path(self, number:int) -> str:
+        return os.path.join(
+            self.directory, 'segment-%016d.log' % number
+        )
+
+    def _segment_numbers(self) -> list:
+        return sorted(
+            int(name[8:-4]) for name in os.listdir(self.directory) 
+            if name.startswith('segment-') and name.endswith('.log')
+        )
+
+    def _recover(self, number:int) -> int:
+        """
+Finds the end of the last complete, intact record in a segment, 
+truncates anything after it, and returns its size
+"""
+        path = self._segment_path(number)
+        if not os.path.exists(path):
+            open(path, 'wb').close()
+            return 0
+        with open(path, 'r+b') as segment:
+            data = segment.read()
+            offset = 0
+            while offset + self._header.size <= len(data):
+                length, checksum = self._header.unpack_from(
+                    data, offset
+                )
+                start = offset + self._header.size
+                payload = data[start:start + length]
+                if (
+                    len(payload) < length 
+                    or zlib.crc32(payload) != checksum
+                ):
+                    break
+                offset = start + length
+            if offset < len(data):
+                segment.truncate(offset)
+                segment.flush()
+                os.fsync(segment.fileno())
+        return offset
+
+    def _load_checkpoint(self, segments:list) -> tuple:
+        path = os.path.join(self.directory, 'checkpoint')
+        try:
+            with open(path) as checkpoint:
+                number, offset = [
+                    int(value) for value in checkpoint.read().split()
+                ]
+        except (OSError, ValueError):
+            return segments[0], 0
+        if number not in segments:
+            # - The checkpointed segment was read to the end, and 
+            #   deleted, before the next checkpoint was written
+            return segments[0], 0
+        if number == self._write_segment:
+            offset = min(offset, self._written)
+        return number, offset
+
+    def _write_checkpoint(self, number:int, offset:int):
+        path = os.path.join(self.directory, 'checkpoint')
+        with open(path + '.tmp', 'w') as checkpoint:
+            checkpoint.write('%d %d' % (number, offset))
+            checkpoint.flush()
+            os.fsync(checkpoint.fileno())
+        os.replace(path + '.tmp', path)
+
+    def put(self, record:bytes):
+        with self._lock:
+            self._writer.write(
+                self._header.pack(len(record), zlib.crc32(record))
+            )
+            self._writer.write(record)
+            self._written += self._header.size + len(record)
+            self._dirty = True
+            if self._written >= self.segment_size:
+                self._roll()
+            self._not_empty.notify()
+
+    def _roll(self):
+        # - Called with the lock held: finishes the current segment, 
+        #   and starts a new one
+        self._writer.flush()
+        os.fsync(self._writer.fileno())
+        self._writer.close()
+        self._write_segment += 1
+        self._writer = open(
+            self._segment_path(self._write_segment), 'ab'
+        )
+        self._written = 0
+        self._flushed = 0
+
+    def get_nowait(self) -> bytes:
+        with self._lock:
+            return self._get()
+
+    def get(self, timeout=None) -> bytes:
+        """
+Gets the next record, waiting for up to timeout seconds (forever if 
+it's None) for one to be put, and raising queue.Empty if none is
+"""
+        with self._not_empty:
+            deadline = (
+                None if timeout == None else monotonic() + timeout
+            )
+            while True:
+                try:
+                    return self._get()
+                except Empty:
+                    remaining = (
+                        None if deadline == None 
+                        else deadline - monotonic()
+                    )
+                    if remaining != None and remaining <= 0:
+                        raise
+                    self._not_empty.wait(remaining)
+
+    def _get(self) -> bytes:
+        # - Called with the lock held
+        while True:
+            live = self._read_segment == self._write_segment
+            if (
+                live and 
+                self._read_offset + self._header.size > self._flushed
+            ):
+                # - The next record may only be in the writer's buffer
+                self._writer.flush()
+                self._flushed = self._written
+            header = self._reader.read(self._header.size)
+            if len(header) == self._header.size:
+                length, checksum = self._header.unpack(header)
+                record = self._reader.read(length)
+                self._read_offset += self._header.size + length
+                return record
+            if live:
+                self._reader.seek(self._read_offset)
+                raise Empty
+            # - The read segment is finished with: move on to the 
+            #   next one, and delete it
+            self._reader.close()
+            os.remove(self._segment_path(self._read_segment))
+            self._read_segment += 1
+            self._read_offset = 0
+            self._reader = open(
+                self._segment_path(self._read_segment), 'rb'
+            )
+
+    def sync(self):
+        """
+Commits everything put so far to disk, and checkpoints the read 
+position
+"""
+        with self._lock:
+            self._writer.flush()
+            self._flushed = self._written
+            self._dirty = False
+            writer = self._writer
+            checkpoint = (self._read_segment, self._read_offset)
+            # - fsync can take a while, so puts and gets can carry 
+            #   on while it happens; the segment may be rolled (and 
+            #   its writer closed) meanwhile, but that syncs it too
+            fileno = os.dup(writer.fileno())
+        with self._checkpoint_lock:
+            try:
+                os.fsync(fileno)
+            finally:
+                os.close(fileno)
+            if (
+                self._checkpointed == None 
+                or checkpoint > self._checkpointed
+            ):
+                self._write_checkpoint(*checkpoint)
+                self._checkpointed = checkpoint
+
+    def _sync_loop(self):
+        last_checkpoint = None
+        while not self._closed.wait(self.sync_interval):
+            position = (self._read_segment, self._read_offset)
+            if self._dirty or position != last_checkpoint:
+                # - A failed sync is kept in sync_error, and retried 
+                #   next time round, rather than stopping group commits
+                try:
+                    self.sync()
+                except Exception as error:
+                    self.sync_error = error
+                    continue
+                last_checkpoint = position
+
+    def close(self):
+        if self._closed.is_set():
+            return
+        self._closed.set()
+        self._syncer.join()
+        self.sync()
+        with self._lock:
+            self._writer.close()
+            self._reader.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+queue_directory = tempfile.mkdtemp(prefix='durable-queue-')
+with DurableQueue(queue_directory) as my_queue:
+    for value in (b'one', b'two', b'three'):
+        my_queue.put(value)
+    print_line('record (got)', str(my_queue.get_nowait()), 1)
+with DurableQueue(queue_directory) as my_queue:
+    print_line('record (re-opened)', str(my_queue.get_nowait()), 1)
+    print_line('record (re-opened)', str(my_queue.get_nowait()), 1)
+shutil.rmtree(queue_directory)
+
+# - Dequeueing by priority: a binary heap (via heapq) keeps the 
+#   highest-priority (lowest-valued) member at the front, in 
+#   O(log n) per push or pop, instead of re-sorting the whole queue
+
+import heapq
+
+from itertools import count
+
+class HeapPriorityQueue:
+    """
+Provides a priority queue, where the member with the lowest priority 
+value is dequeued first, and members with equal priorities are 
+dequeued in the order they were pushed. push returns a handle that 
+can be used to change the priority of, or remove, the member later. 
+Changed and removed members are marked as such and left in the heap 
+until they reach the front (or until they make up most of it), 
+rather than being searched for.
+"""
+    # - Marks a heap entry whose member was removed, or re-pushed 
+    #   with a new priority
+    _removed = object()
+
+    def __init__(self, items=()):
+        self._sequence = count()
+        # - Heap entries are [priority, handle, version, value] lists. 
+        #   The handle is the sequence number of the push that added 
+        #   the member, which keeps equal priorities in FIFO order, 
+        #   and the version is unique to each entry, so that values 
+        #   are never compared
+        self._heap = []
+        for priority, value in items:
+            handle = next(self._sequence)
+            self._heap.append([priority, handle, handle, value])
+        heapq.heapify(self._heap)
+        self._entries = {entry[1]:entry for entry in self._heap}
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, handle):
+        return handle in self._entries
+
+    def push(self, priority, value):
+        handle = next(self._sequence)
+        entry = [priority, handle, handle, value]
+        self._entries[handle] = entry
+        heapq.heappush(self._heap, entry)
+        return handle
+
+    def _discard_removed(self):
+        while self._heap and self._heap[0][3] is self._removed:
+            heapq.heappop(self._heap)
+
+    def peek(self):
+        """Returns the (priority, value) at the front of the queue"""
+        self._discard_removed()
+        if not self._heap:
+            raise IndexError(
+                'peek at an empty %s' % self.__class__.__name__
+            )
+        return self._heap[0][0], self._heap[0][3]
+
+    def pop(self):
+        """
+Removes the member at the front of the queue, returning its 
+(priority, value)
+"""
+        self._discard_removed()
+        if not self._heap:
+            raise IndexError(
+                'pop from an empty %s' % self.__class__.__name__
+            )
+        priority, handle, version, value = heapq.heappop(self._heap)
+        del self._entries[handle]
+        return priority, value
+
+    def _compact(self):
+        # - Once most of the heap is removed entries, rebuild it from 
+        #   the live ones, in O(n)
+        if len(self._heap) > 64 and len(self._heap) > 2 * len(self):
+            self._heap = list(self._entries.values())
+            heapq.heapify(self._heap)
+
+    def remove(self, handle):
+        """Removes the member with handle, and returns its value"""
+        entry = self._entries.pop(handle)
+        value = entry[3]
+        entry[3] = self._removed
+        self._compact()
+        return value
+
+    def change_priority(self, handle, priority):
+        """
+Changes the priority of the member with handle. It keeps its place 
+among members with the same priority.
+"""
+        entry = self._entries[handle]
+        new_entry = [priority, handle, next(self._sequence), entry[3]]
+        entry[3] = self._removed
+        self._entries[handle] = new_entry
+        heapq.heappush(self._heap, new_entry)
+        self._compact()
+
+    def decrease_key(self, handle, priority):
+        """
+Moves the member with handle towards the front of the queue, by 
+lowering its priority value
+"""
+        if priority > self._entries[handle][0]:
+            raise ValueError(
+                'decrease_key cannot raise a priority from %s to %s' % 
+                (self._entries[handle][0], priority)
+            )
+        self.change_priority(handle, priority)
+
+my_queue = HeapPriorityQueue([(3, 'low'), (1, 'urgent'), (2, 'normal')])
+later = my_queue.push(2, 'normal, pushed later')
+dropped = my_queue.push(0, 'dropped')
+whenever = my_queue.push(5, 'whenever')
+my_queue.remove(dropped)
+my_queue.decrease_key(whenever, 2)
+print('Popping all members of a HeapPriorityQueue')
+while my_queue:
+    print_line('priority, value (popped)', str(my_queue.pop()), 1, 32)
+
+# - Putting deques to work in a task scheduler: each worker thread 
+#   has its own deque of tasks, and takes the most recently added 
+#   task from one end, while idle workers "steal" the oldest tasks 
+#   from the other end of their busier neighbors' deques
+
+import random
+
+from concurrent.futures import Executor, Future, ThreadPoolExecutor
+
+class WorkStealingExecutor(Executor):
+    """
+Provides a concurrent.futures executor that runs tasks on 
+max_workers threads, each with its own deque of tasks. Tasks 
+submitted from outside the executor are spread across the deques in 
+turn; tasks submitted by a running task go onto its worker's own 
+deque. Workers run their own newest task first, and steal the 
+oldest task from another worker when their own deque is empty. 
+stats returns counts of tasks run and stolen by each worker, and 
+the current depth of each worker's deque.
+"""
+    def __init__(self, max_workers=None):
+        if max_workers == None:
+            max_workers = min(32, (os.cpu_count() or 1) + 4)
+        self._deques = [deque() for i in range(max_workers)]
+        self._executed = [0]*max_workers
+        self._steals = [0]*max_workers
+        # - Counts the tasks that are in the deques but not yet 
+        #   claimed by a worker, plus one per worker at shut-down
+        self._available = threading.Semaphore(0)
+        self._next_deque = count()
+        self._shutdown = False
+        self._shutdown_lock = threading.Lock()
+        self._local = threading.local()
+        self._workers = [
+            threading.Thread(
+                target=self._work, args=(index,), 
+                name='WorkStealingExecutor-%d' % index
+            ) for index in range(max_workers)
+        ]
+        for worker in self._workers:
+            worker.daemon = True
+            worker.start()
+
+    def submit(self, fn, *args, **kwargs):
+        with self._shutdown_lock:
+            if self._shutdown:
+                raise RuntimeError(
+                    'cannot schedule new futures after shutdown'
+                )
+            future = Future()
+            index = getattr(self._local, 'index', None)
+            if index == None:
+                index = next(self._next_deque) % len(self._deques)
+            self._deques[index].append((future, fn, args, kwargs))
+            self._available.release()
+            return future
+
+    def _claim(self, index:int):
+        """
+Takes a task from the worker's own deque, or steals one from 
+another, returning None if there are none anywhere
+"""
+        try:
+            return self._deques[index].pop()
+        except IndexError:
+            pass
+        victims = list(range(len(self._deques)))
+        random.shuffle(victims)
+        for victim in victims:
+            if victim == index:
+                continue
+            try:
+                task = self._deques[victim].popleft()
+            except IndexError:
+                continue
+            self._steals[index] += 1
+            return task
+        return None
+
+    def _work(self, index:int):
+        self._local.index = index
+        while True:
+            self._available.acquire()
+            task = self._claim(index)
+            while task == None:
+                if self._shutdown:
+                    return
+                # - The task this worker was counted in for hasn't 
+                #   been found yet: look again
+                sleep(0)
+                task = self._claim(index)
+            future, fn, args, kwargs = task
+            if not future.set_running_or_notify_cancel():
+                continue
+            try:
+                result = fn(*args, **kwargs)
+            except BaseException as error:
+                future.set_exception(error)
+            else:
+                future.set_result(result)
+            self._executed[index] += 1
+
+    def stats(self) -> dict:
+        return {
+            'workers':len(self._workers), 
+            'executed':list(self._executed), 
+            'steals':list(self._steals), 
+            'total_steals':sum(self._steals), 
+            'queue_depths':[len(tasks) for tasks in self._deques], 
+        }
+
+    def shutdown(self, wait=True, *, cancel_futures=False):
+        with self._shutdown_lock:
+            if self._shutdown:
+                return
+            self._shutdown = True
+            if cancel_futures:
+                for tasks in self._deques:
+                    while True:
+                        try:
+                            tasks.popleft()[0].cancel()
+                        except IndexError:
+                            break
+            for worker in self._workers:
+                self._available.release()
+        if wait:
+            for worker in self._workers:
+                worker.join()
+
+with WorkStealingExecutor(max_workers=4) as executor:
+    squares = list(
+        executor.map(lambda number: number * number, range(10))
+    )
+    futures = [executor.submit(sleep, 0.001) for i in range(40)]
+    for future in futures:
+        future.result()
+    print_line('squares (from executor)', str(squares))
+    stats = executor.stats()
+print_line('executor stats', 'executed %s, steals %s' % (
+    stats['executed'], stats['steals']
+))
+
+# - Batching for asyncio consumers: rather than polling a deque, 
+#   consumers wait for a batch of values, for no longer than a 
+#   "linger" time once the first value has arrived, and producers 
+#   wait whenever the queue is at its high-water mark
+
+import asyncio
+
+class AsyncBatchQueue:
+    """
+Provides a deque-backed queue for asyncio tasks. Consumers await 
+get_batch, which returns as soon as max_size values are available, 
+or max_linger_ms after at least one is; producers await put, which 
+waits while high_water_mark values are queued. Only as many waiting 
+tasks are woken as can make progress.
+"""
+    def __init__(self, high_water_mark:int=10000):
+        self.high_water_mark = high_water_mark
+        self._items = deque()
+        # - Waiting consumers, as [future, threshold] pairs: each is 
+        #   woken when at least threshold values are queued
+        self._getters = deque()
+        self._putters = deque()
+
+    def __len__(self):
+        return len(self._items)
+
+    def _wake_getter(self):
+        # - Wake the first waiting consumer that can make progress, 
+        #   discarding any that have timed out or been cancelled
+        for entry in list(self._getters):
+            future, threshold = entry
+            if future.done():
+                self._getters.remove(entry)
+            elif len(self._items) >= threshold:
+                self._getters.remove(entry)
+                future.set_result(None)
+                return
+
+    def _wake_putters(self, count:int):
+        while count and self._putters:
+            putter = self._putters.popleft()
+            if not putter.done():
+                putter.set_result(None)
+                count -= 1
+
+    async def put(self, value):
+        while len(self._items) >= self.high_water_mark:
+            putter = asyncio.get_running_loop().create_future()
+            self._putters.append(putter)
+            try:
+                await putter
+            except asyncio.CancelledError:
+                if putter.done() and not putter.cancelled():
+                    # - It was woken, so pass that on to another
+                    self._wake_putters(1)
+                raise
+        self._items.append(value)
+        self._wake_getter()
+
+    async def _wait(self, threshold:int, timeout=None):
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._getters.append([future, threshold])
+        timer = None
+        if timeout != None:
+            timer = loop.call_later(
+                timeout, 
+                lambda: future.done() or future.set_result(None)
+            )
+        try:
+            await future
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                self._wake_getter()
+            raise
+        finally:
+            if timer != None:
+                timer.cancel()
+
+    async def get_batch(self, max_size:int=100, max_linger_ms:float=0):
+        """
+Waits for values to be queued, and returns a list of up to max_size 
+of them, waiting up to max_linger_ms after the first one arrives 
+for the rest
+"""
+        loop = asyncio.get_running_loop()
+        deadline = None
+        while True:
+            if not self._items:
+                await self._wait(1)
+                continue
+            if len(self._items) >= max_size or max_linger_ms <= 0:
+                break
+            if deadline == None:
+                deadline = loop.time() + max_linger_ms / 1000
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                break
+            await self._wait(max_size, remaining)
+        count = min(max_size, len(self._items))
+        batch = [self._items.popleft() for i in range(count)]
+        self._wake_putters(count)
+        if self._items:
+            self._wake_getter()
+        return batch
+
+async def async_batch_queue_demo():
+    my_queue = AsyncBatchQueue(high_water_mark=5)
+
+    async def producer(name):
+        for number in range(4):
+            await my_queue.put('%s%d' % (name, number))
+            await asyncio.sleep(0.001)
+
+    producers = asyncio.gather(*(producer(name) for name in 'abc'))
+    received = 0
+    while received < 12:
+        batch = await my_queue.get_batch(max_size=5, max_linger_ms=2)
+        print_line('batch (awaited)', str(batch), 1)
+        received += len(batch)
+    await producers
+
+asyncio.run(async_batch_queue_demo())
+
+# - Pacing what is taken from a queue: a token-bucket limits how 
+#   many members can be dequeued per second (with some allowance for 
+#   bursts), and members that have waited longer than a time-to-live 
+#   are dropped, both worked out when dequeueing, without sleeping
+
+class RateLimitedQueue:
+    """
+Provides a deque-backed queue whose dequeue returns immediately with 
+the members that are eligible: no more than rate per second, with up 
+to burst at once, and none that were appended more than ttl seconds 
+ago (if a ttl is set), which are discarded. The expired counter 
+counts members discarded for being too old, the throttled counter 
+counts ready members that dequeue calls held back because of the 
+rate limit, and throttled_calls counts the dequeue calls that held 
+any back. clock is the time-source, in seconds.
+"""
+    def __init__(self, rate:float, burst:float=1, ttl=None, 
+        clock=monotonic):
+        self.rate = rate
+        self.burst = burst
+        self.ttl = ttl
+        self._clock = clock
+        # - Members are kept as (time appended, value) pairs, which 
+        #   are in time-order, so expired members are always at the 
+        #   front
+        self._items = deque()
+        self._tokens = burst
+        self._refilled = clock()
+        self.expired = 0
+        self.throttled = 0
+        self.throttled_calls = 0
+
+    def __len__(self):
+        return len(self._items)
+
+    def append(self, value):
+        self._items.append((self._clock(), value))
+
+    def _expire(self, now:float):
+        if self.ttl == None:
+            return
+        oldest_allowed = now - self.ttl
+        while self._items and self._items[0][0] < oldest_allowed:
+            self._items.popleft()
+            self.expired += 1
+
+    def dequeue(self, max_items=None) -> list:
+        """
+Removes and returns a list of up to max_items (or as many as are 
+allowed, if it's None) eligible members, which may be empty
+"""
+        now = self._clock()
+        self._expire(now)
+        refill = (now - self._refilled) * self.rate
+        self._tokens = min(self.burst, self._tokens + refill)
+        self._refilled = now
+        wanted = len(self._items)
+        if max_items != None and max_items < wanted:
+            wanted = max_items
+        count = min(wanted, int(self._tokens))
+        self._tokens -= count
+        if count < wanted:
+            self.throttled += wanted - count
+            self.throttled_calls += 1
+        return [self._items.popleft()[1] for i in range(count)]
+
+class manual_clock:
+    """A clock for demonstrations, which only moves when it's told to"""
+    def __init__(self):
+        self.now = 0.0
+    def __call__(self):
+        return self.now
+
+clock = manual_clock()
+my_queue = RateLimitedQueue(rate=2, burst=3, ttl=5, clock=clock)
+for value in range(10):
+    my_queue.append(value)
+print('Dequeueing from a RateLimitedQueue (2/sec, bursts of 3)')
+for seconds in (0, 0.5, 1, 3, 10):
+    clock.now = seconds
+    print_line(
+        'at %s seconds' % seconds, str(my_queue.dequeue()), 1
+    )
+print_line(
+    'my_queue counters', 
+    'expired=%d, throttled=%d, throttled_calls=%d' % (
+        my_queue.expired, my_queue.throttled, my_queue.throttled_calls
+    )
+)
+
+# - Measuring the queueing options: enqueue/dequeue throughput and 
+#   latency percentiles, for various queue sizes and numbers of 
+#   producer/consumer threads (or asyncio tasks), as JSON
+
+import argparse
+import json
+import queue
+
+from functools import partial
+from time import perf_counter, perf_counter_ns
+
+def _latency_summary(samples:list) -> dict:
+    """
+Summarizes latency samples (in nanoseconds) as percentiles, in 
+microseconds
+"""
+    if not samples:
+        return {}
+    samples = sorted(samples)
+    summary = {}
+    for name, fraction in (
+        ('p50', 0.5), ('p90', 0.9), ('p99', 0.99), ('p99.9', 0.999)
+    ):
+        index = min(len(samples) - 1, int(len(samples) * fraction))
+        summary[name] = round(samples[index] / 1000, 3)
+    summary['max'] = round(samples[-1] / 1000, 3)
+    return summary
+
+def _timed_ops(operation, count:int, stride:int, samples:list, 
+    with_values=True):
+    """
+Calls operation count times (with the call-number as its argument 
+if with_values is true), timing every stride-th call into samples
+"""
+    timer = perf_counter_ns
+    for number in range(count):
+        if number % stride:
+            if with_values:
+                operation(number)
+            else:
+                operation()
+        else:
+            start = timer()
+            if with_values:
+                operation(number)
+            else:
+                operation()
+            samples.append(timer() - start)
+
+class _SignalledQueue:
+    """
+Pairs a queue that has no blocking get-operation with a semaphore 
+that counts its members, so that threaded consumers wait on the 
+semaphore until a value is available, rather than polling
+"""
+    def __init__(self, items, get):
+        self.items = items
+        self._get = get
+        self._available = threading.Semaphore(0)
+
+    def put(self, value):
+        self.items.append(value)
+        self._available.release()
+
+    def get(self):
+        self._available.acquire()
+        return self._get(self.items)
+
+# - Each candidate provides a factory (taking the queue size), and 
+#   a function that returns the put- and get-operations of a queue 
+#   that it created: non-blocking ones, when threaded is False, and 
+#   ones that wait if needed when it's True. Queues without a 
+#   blocking get are wrapped in a _SignalledQueue when threaded
+queue_candidates = {
+    'list.pop(0)': (
+        lambda size: [], 
+        lambda items: items.pop(0), 
+    ), 
+    'deque': (
+        lambda size: deque(), 
+        deque.popleft, 
+    ), 
+    'RingBufferQueue': (
+        lambda size: RingBufferQueue(size), 
+        RingBufferQueue.popleft, 
+    ), 
+    'RingBufferQueue(q)': (
+        lambda size: RingBufferQueue(size, typecode='q'), 
+        RingBufferQueue.popleft, 
+    ), 
+    'queue.Queue': (
+        lambda size: queue.Queue(), 
+        None, 
+    ), 
+}
+
+def _queue_operations(name:str, size:int, threaded:bool):
+    """
+Creates a queue_candidates queue of size, and returns its put- and 
+get-operations
+"""
+    factory, get = queue_candidates[name]
+    my_queue = factory(size)
+    if get == None:
+        if threaded:
+            return my_queue.put, my_queue.get
+        return my_queue.put_nowait, my_queue.get_nowait
+    if threaded:
+        my_queue = _SignalledQueue(my_queue, get)
+        return my_queue.put, my_queue.get
+    return my_queue.append, partial(get, my_queue)
+
+def benchmark_queue(name:str, size:int, threads:int, 
+    latency_samples:int=10000) -> dict:
+    """
+Benchmarks one of the queue_candidates: with one thread, size 
+values are enqueued and then dequeued; with more threads, that many 
+producer and consumer threads share size values concurrently
+"""
+    result = {'structure':name, 'size':size, 'threads':threads}
+    stride = max(1, size // latency_samples)
+    enqueue_samples = []
+    dequeue_samples = []
+    if threads == 1:
+        put, get = _queue_operations(name, size, False)
+        start = perf_counter()
+        _timed_ops(put, size, stride, enqueue_samples)
+        enqueued = perf_counter() - start
+        start = perf_counter()
+        _timed_ops(get, size, stride, dequeue_samples, False)
+        dequeued = perf_counter() - start
+        result['enqueue_ops_per_sec'] = round(size / enqueued)
+        result['dequeue_ops_per_sec'] = round(size / dequeued)
+    else:
+        put, get = _queue_operations(name, size, True)
+        count = size // threads
+        workers = [
+            threading.Thread(
+                target=_timed_ops, 
+                args=(put, count, stride, enqueue_samples)
+            ) for i in range(threads)
+        ] + [
+            threading.Thread(
+                target=_timed_ops, 
+                args=(get, count, stride, dequeue_samples, False)
+            ) for i in range(threads)
+        ]
+        start = perf_counter()
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+        elapsed = perf_counter() - start
+        result['transfer_ops_per_sec'] = round(
+            count * threads / elapsed
+        )
+    result['enqueue_latency_us'] = _latency_summary(enqueue_samples)
+    result['dequeue_latency_us'] = _latency_summary(dequeue_samples)
+    return result
+
+def benchmark_asyncio_queue(size:int, tasks:int, 
+    latency_samples:int=10000) -> dict:
+    """
+Benchmarks asyncio.Queue, with a single task enqueueing and then 
+dequeueing size values, or with that many producer and consumer 
+tasks sharing size values concurrently
+"""
+    result = {'structure':'asyncio.Queue', 'size':size, 'threads':tasks}
+    stride = max(1, size // latency_samples)
+    enqueue_samples = []
+    dequeue_samples = []
+
+    async def timed_ops(operation, count, samples, with_values=True):
+        timer = perf_counter_ns
+        for number in range(count):
+            start = timer()
+            if with_values:
+                await operation(number)
+            else:
+                await operation()
+            if not number % stride:
+                samples.append(timer() - start)
+
+    async def run():
+        my_queue = asyncio.Queue()
+        if tasks == 1:
+            start = perf_counter()
+            await timed_ops(my_queue.put, size, enqueue_samples)
+            enqueued = perf_counter() - start
+            start = perf_counter()
+            await timed_ops(my_queue.get, size, dequeue_samples, False)
+            dequeued = perf_counter() - start
+            result['enqueue_ops_per_sec'] = round(size / enqueued)
+            result['dequeue_ops_per_sec'] = round(size / dequeued)
+        else:
+            count = size // tasks
+            start = perf_counter()
+            await asyncio.gather(*(
+                [
+                    timed_ops(my_queue.put, count, enqueue_samples) 
+                    for i in range(tasks)
+                ] + [
+                    timed_ops(
+                        my_queue.get, count, dequeue_samples, False
+                    ) for i in range(tasks)
+                ]
+            ))
+            elapsed = perf_counter() - start
+            result['transfer_ops_per_sec'] = round(
+                count * tasks / elapsed
+            )
+
+    asyncio.run(run())
+    result['enqueue_latency_us'] = _latency_summary(enqueue_samples)
+    result['dequeue_latency_us'] = _latency_summary(dequeue_samples)
+    return result
+
+def _produce_records(my_queue, count:int):
+    for number in range(count):
+        my_queue.put((number, number * 0.5))
+
+def _consume_records(my_queue, count:int):
+    for number in range(count):
+        my_queue.get()
+
+def benchmark_multiprocess_queue(name:str, records:int, 
+    processes:int, capacity:int=10000) -> dict:
+    """
+Measures how fast records cross from producer processes to consumer 
+processes through a SharedMemoryQueue (single producer/consumer 
+only), SharedMemoryMPMCQueue or multiprocessing.Queue
+"""
+    if name == 'SharedMemoryQueue':
+        my_queue = SharedMemoryQueue('qd', capacity)
+    elif name == 'SharedMemoryMPMCQueue':
+        my_queue = SharedMemoryMPMCQueue('qd', capacity)
+    else:
+        my_queue = multiprocessing.Queue(capacity)
+    count = records // processes
+    workers = [
+        multiprocessing.Process(
+            target=target, args=(my_queue, count)
+        ) 
+        for i in range(processes) 
+        for target in (_produce_records, _consume_records)
+    ]
+    start = perf_counter()
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    elapsed = perf_counter() - start
+    if name != 'multiprocessing.Queue':
+        my_queue.close()
+    return {
+        'structure':name, 'records':count * processes, 
+        'processes':processes, 
+        'transfer_ops_per_sec':round(count * processes / elapsed)
+    }
+
+def benchmark_durable_queue(records:int, record_size:int=16) -> dict:
+    """
+Measures how fast small records can be put into, and then got from, 
+a DurableQueue in a temporary directory
+"""
+    directory = tempfile.mkdtemp(prefix='durable-queue-')
+    record = bytes(record_size)
+    try:
+        with DurableQueue(directory) as my_queue:
+            start = perf_counter()
+            for number in range(records):
+                my_queue.put(record)
+            my_queue.sync()
+            put_time = perf_counter() - start
+            start = perf_counter()
+            for number in range(records):
+                my_queue.get_nowait()
+            my_queue.sync()
+            get_time = perf_counter() - start
+    finally:
+        shutil.rmtree(directory)
+    return {
+        'structure':'DurableQueue', 'records':records, 
+        'record_size':record_size, 
+        'put_ops_per_sec':round(records / put_time), 
+        'get_ops_per_sec':round(records / get_time)
+    }
+
+def _crash_while_writing(directory:str, count:int, synced:int):
+    """
+Puts count numbered records into a DurableQueue, and once synced of 
+them have been put, gets half of those and syncs. Then it leaves a 
+partly-written record at the end, and exits without closing the 
+queue, as if the process had crashed
+"""
+    my_queue = DurableQueue(
+        directory, segment_size=4096, sync_interval=3600
+    )
+    for number in range(count):
+        my_queue.put(b'%d' % number)
+        if number + 1 == synced:
+            for i in range(synced // 2):
+                my_queue.get_nowait()
+            my_queue.sync()
+    my_queue._writer.write(
+        DurableQueue._header.pack(100, 0) + b'partial'
+    )
+    my_queue._writer.flush()
+    os._exit(1)
+
+def check_crash_recovery(count:int=5000, synced:int=3000) -> bool:
+    """
+Crashes a process that is using a DurableQueue, re-opens the queue, 
+and checks that reading resumes at the checkpoint, and that every 
+record that was synced is recovered, intact and in order
+"""
+    directory = tempfile.mkdtemp(prefix='durable-queue-')
+    try:
+        writer = multiprocessing.Process(
+            target=_crash_while_writing, 
+            args=(directory, count, synced)
+        )
+        writer.start()
+        writer.join()
+        records = []
+        with DurableQueue(directory) as my_queue:
+            while True:
+                try:
+                    records.append(int(my_queue.get_nowait()))
+                except Empty:
+                    break
+    finally:
+        shutil.rmtree(directory)
+    first = synced // 2
+    recovered = (
+        records == list(range(first, first + len(records))) 
+        and first + len(records) >= synced
+    )
+    print_line(
+        'crash recovery', '%s (%d records, %d to %d)' % (
+            'OK' if recovered else 'FAILED', len(records), 
+            records[0] if records else -1, 
+            records[-1] if records else -1
+        )
+    )
+    return recovered
+
+def benchmark_priority_queue(size:int=100000, 
+    resorted_operations:int=1000) -> list:
+    """
+Compares a HeapPriorityQueue with a deque that is sorted before each 
+popleft, by timing operations that each push a random priority and 
+pop the front member, on queues holding size members. Re-sorting is 
+so slow that it's only timed for resorted_operations operations.
+"""
+    priorities = [randint(0, size) for i in range(size * 2)]
+    my_queue = HeapPriorityQueue(
+        (priority, None) for priority in priorities[:size]
+    )
+    start = perf_counter()
+    for priority in priorities[size:]:
+        my_queue.push(priority, None)
+        my_queue.pop()
+    heap_time = perf_counter() - start
+    sorted_queue = deque(
+        (priority, number, None) 
+        for number, priority in enumerate(priorities[:size])
+    )
+    start = perf_counter()
+    for number in range(size, size + resorted_operations):
+        sorted_queue.append((priorities[number], number, None))
+        sorted_queue = deque(sorted(sorted_queue))
+        sorted_queue.popleft()
+    sorted_time = perf_counter() - start
+    return [
+        {
+            'structure':'HeapPriorityQueue', 'size':size, 
+            'ops_per_sec':round(size / heap_time)
+        }, 
+        {
+            'structure':'deque (sorted before popleft)', 'size':size, 
+            'ops_per_sec':round(resorted_operations / sorted_time)
+        }, 
+    ]
+
+def benchmark_executors(tasks:int, workers:int=8, 
+    task_sleep:float=0.0001) -> list:
+    """
+Compares how long a WorkStealingExecutor and a ThreadPoolExecutor 
+take to run many small tasks that release the GIL (by sleeping for 
+task_sleep seconds)
+"""
+    results = []
+    for name, factory in (
+        ('WorkStealingExecutor', WorkStealingExecutor), 
+        ('ThreadPoolExecutor', ThreadPoolExecutor), 
+    ):
+        with factory(max_workers=workers) as executor:
+            start = perf_counter()
+            for result in executor.map(sleep, [task_sleep]*tasks):
+                pass
+            elapsed = perf_counter() - start
+            result = {
+                'structure':name, 'tasks':tasks, 'workers':workers, 
+                'task_sleep':task_sleep, 
+                'tasks_per_sec':round(tasks / elapsed)
+            }
+            if name == 'WorkStealingExecutor':
+                result['steals'] = executor.stats()['total_steals']
+        results.append(result)
+    return results
+
+def benchmark_batch_queue(producers:int, values_per_producer:int=10, 
+    consumers:int=4, max_size:int=256, max_linger_ms:float=2) -> list:
+    """
+Measures throughput, and the latency from put to receipt, of values 
+sent by producers concurrent tasks to consumers tasks, through an 
+AsyncBatchQueue and through an asyncio.Queue read one value at a time
+"""
+    total = producers * values_per_producer
+    results = []
+
+    async def run(name):
+        latencies = []
+        if name == 'AsyncBatchQueue':
+            my_queue = AsyncBatchQueue(high_water_mark=10000)
+
+            async def receive():
+                return await my_queue.get_batch(max_size, max_linger_ms)
+        else:
+            my_queue = asyncio.Queue(maxsize=10000)
+
+            async def receive():
+                return [await my_queue.get()]
+
+        async def producer():
+            for number in range(values_per_producer):
+                await my_queue.put(perf_counter_ns())
+                await asyncio.sleep(0)
+
+        async def consumer():
+            while len(latencies) < total:
+                batch = await receive()
+                now = perf_counter_ns()
+                latencies.extend(now - sent for sent in batch)
+
+        start = perf_counter()
+        consumer_tasks = [
+            asyncio.ensure_future(consumer()) for i in range(consumers)
+        ]
+        await asyncio.gather(*(producer() for i in range(producers)))
+        while len(latencies) < total:
+            await asyncio.sleep(0.001)
+        elapsed = perf_counter() - start
+        for task in consumer_tasks:
+            task.cancel()
+        await asyncio.gather(*consumer_tasks, return_exceptions=True)
+        results.append({
+            'structure':name, 'producers':producers, 
+            'consumers':consumers, 'values':total, 
+            'values_per_sec':round(total / elapsed), 
+            'latency_us':_latency_summary(latencies)
+        })
+
+    for name in ('AsyncBatchQueue', 'asyncio.Queue'):
+        asyncio.run(run(name))
+    return results
+
+def benchmark_rate_limited_queue(sizes:list) -> list:
+    """
+Measures the time per dequeue call of a RateLimitedQueue holding 
+each of sizes members, with a rate that lets one member out for 
+each call, and a ttl that expires the second half of them in one 
+call, which should stay about the same whatever the size
+"""
+    results = []
+    for size in sizes:
+        clock = manual_clock()
+        my_queue = RateLimitedQueue(
+            rate=1000, burst=1, ttl=size / 1000, clock=clock
+        )
+        for value in range(size):
+            my_queue.append(value)
+        calls = 0
+        start = perf_counter()
+        while my_queue:
+            # - Two tokens' worth of time passes, but the bucket is 
+            #   capped at the burst of one, so every call takes 
+            #   exactly one member (rounding can't leave it a fraction 
+            #   short of a token), holding back every other ready 
+            #   member, which all count as throttled, and the call 
+            #   as one of the throttled_calls
+            clock.now += 0.002
+            my_queue.dequeue()
+            calls += 1
+        elapsed = perf_counter() - start
+        results.append({
+            'structure':'RateLimitedQueue', 'size':size, 
+            'calls':calls, 'expired':my_queue.expired, 
+            'throttled':my_queue.throttled, 
+            'throttled_calls':my_queue.throttled_calls, 
+            'ns_per_call':round(elapsed * 1e9 / calls)
+        })
+    return results
+
+def run_queue_benchmarks(arguments:list):
+    """
+Runs the queue benchmark suite, with options parsed from arguments, 
+and writes the results as JSON
+"""
+    parser = argparse.ArgumentParser(
+        description='Queue throughput and latency benchmarks'
+    )
+    parser.add_argument('--benchmark', action='store_true')
+    parser.add_argument(
+        '--sizes', default='1000,10000,100000,1000000,10000000', 
+        help='Comma-separated queue sizes'
+    )
+    parser.add_argument(
+        '--threads', default='1,4,16', 
+        help='Comma-separated numbers of producer/consumer threads'
+    )
+    parser.add_argument(
+        '--max-list-size', type=int, default=100000, 
+        help='The largest size to run list.pop(0), which is O(n) '
+            'per dequeue, with'
+    )
+    parser.add_argument(
+        '--records', type=int, default=200000, 
+        help='The number of records to pass between processes'
+    )
+    parser.add_argument(
+        '--processes', default='1,4', 
+        help='Comma-separated numbers of producer/consumer processes'
+    )
+    parser.add_argument(
+        '--tasks', type=int, default=20000, 
+        help='The number of tasks to run through each executor'
+    )
+    parser.add_argument(
+        '--producers', type=int, default=10000, 
+        help='The number of concurrent asyncio producer tasks'
+    )
+    parser.add_argument(
+        '--output', default='-', 
+        help='The file to write JSON results to (- for stdout)'
+    )
+    options = parser.parse_args(arguments)
+    sizes = [int(size) for size in options.sizes.split(',')]
+    thread_counts = [int(count) for count in options.threads.split(',')]
+    results = []
+    for size in sizes:
+        for threads in thread_counts:
+            for name in queue_candidates:
+                if (
+                    name == 'list.pop(0)' 
+                    and size > options.max_list_size
+                ):
+                    continue
+                results.append(benchmark_queue(name, size, threads))
+            results.append(benchmark_asyncio_queue(size, threads))
+    multiprocess_results = []
+    for processes in options.processes.split(','):
+        processes = int(processes)
+        for name in (
+            'SharedMemoryQueue', 'SharedMemoryMPMCQueue', 
+            'multiprocessing.Queue'
+        ):
+            if name == 'SharedMemoryQueue' and processes > 1:
+                continue
+            multiprocess_results.append(
+                benchmark_multiprocess_queue(
+                    name, options.records, processes
+                )
+            )
+    output = json.dumps(
+        {
+            'python':sys.version, 'results':results, 
+            'multiprocess_results':multiprocess_results, 
+            'durable_results':[
+                benchmark_durable_queue(options.records)
+            ], 
+            'priority_results':benchmark_priority_queue(), 
+            'executor_results':benchmark_executors(options.tasks), 
+            'batching_results':benchmark_batch_queue(
+                options.producers
+            ), 
+            'rate_limited_results':benchmark_rate_limited_queue(sizes)
+        }, indent=2
+    )
+    if options.output == '-':
+        _results_output.write(output + '\n')
+    else:
+        with open(options.output, 'w') as output_file:
+            output_file.write(output)
+
+if __name__ == '__main__':
+    # - Child processes have to be started from here, so that they 
+    #   aren't started again when the module is re-imported by a 
+    #   child that was spawned rather than forked
+    my_queue = SharedMemoryMPMCQueue('qd', 100)
+    producers = [
+        multiprocessing.Process(
+            target=_produce_records, args=(my_queue, 500)
+        ) for i in range(2)
+    ]
+    for producer in producers:
+        producer.start()
+    total = sum(my_queue.get()[1] for i in range(1000))
+    for producer in producers:
+        producer.join()
+    print_line('records (2 producers)', 'total=%s' % total)
+    my_queue.close()
+
+    check_crash_recovery()
+
+    if '--benchmark' in sys.argv:
+        run_queue_benchmarks(sys.argv[1:])
@@ -4,6 +4,16 @@ The complete code of Ch. 5, Recipe 3 --
 Creating Linked Lists in Python
 """
 
+import pickle
+import sys
+import tracemalloc
+
+from array import array
+from copy import deepcopy
+from itertools import chain
+from random import random, randrange
+from time import perf_counter
+
 o1=object()
 o2=object()
 o3=object()
@@ -59,18 +69,66 @@ class LinkedList:
             self.last_member = new_member
 
     def __iter__(self):
-        if not self.first_member:
-            raise StopIteration
-        else:
-            self.__iteritem = self.first_member
-            return self
+        # - Each iteration gets its own cursor, so nested loops 
+        #   (or several threads) over the same list don't 
+        #   interfere with each other
+        return LinkedListCursor(self.first_member)
+
+    def __reversed__(self):
+        # - Members only know about the *next* member, so the 
+        #   chain has to be collected before it can be reversed
+        return reversed(list(LinkedListCursor(self.first_member)))
+
+    # - Pickling and copying would otherwise recurse through every 
+    #   member's next_item, so the chain is flattened into a plain 
+    #   list of values, and rebuilt by appending them again. Any 
+    #   other attributes of the list are kept as they are, but not 
+    #   the ones named in _chain_attributes, which hold (or index) 
+    #   the chain, and are set up again by __init__
+    _chain_attributes = ('first_member', 'last_member')
+
+    def _other_attributes(self) -> dict:
+        return {
+            name:value for name, value in self.__dict__.items() 
+            if name not in self._chain_attributes
+        }
+
+    def __getstate__(self):
+        return {
+            'members':list(self.values()), 
+            'attributes':self._other_attributes()
+        }
+
+    def __setstate__(self, state):
+        self.__init__(*state['members'])
+        self.__dict__.update(state['attributes'])
+
+    def values(self):
+        """Yields the values of the members, in order"""
+        current_item = self.first_member
+        while current_item is not None:
+            yield current_item.value
+            current_item = current_item.next_item
+
+class LinkedListCursor:
+    """
+Iterates over the members of a linked list, starting with the 
+member it was created with
+"""
+    __slots__ = ('_current_item',)
+
+    def __init__(self, first_member):
+        self._current_item = first_member
+
+    def __iter__(self):
+        return self
 
     def __next__(self):
-        if self.__iteritem:
-            result = self.__iteritem
-            self.__iteritem = self.__iteritem.next_item
-            return result
-        raise StopIteration
+        current_item = self._current_item
+        if current_item is None:
+            raise StopIteration
+        self._current_item = current_item.next_item
+        return current_item
 
 
 class IndexedLinkedList(LinkedList):
@@ -78,25 +136,199 @@ class IndexedLinkedList(LinkedList):
 Extends LinkedList to allow retrieval of members by a numeric index
 """
     def __getitem__(self, index:int):
+        # - Walk the chain from first_member, one hop per index 
+        #   position, so each lookup is O(n)
+        if index < 0:
+            raise IndexError('list index out of range')
+        current_item = self.first_member
         for i in range(0,index):
-            if i == 0:
-                current_item = self.first_member
-            else:
-                try:
-                    current_item = current_item.next_item
-                except AttributeError:
-                    raise IndexError('list index out of range')
+            try:
+                current_item = current_item.next_item
+            except AttributeError:
+                raise IndexError('list index out of range')
+        if current_item == None:
+            raise IndexError('list index out of range')
         return current_item
 
+class SkipListMember(ListMember):
+    """
+Represents a member (or node) in an indexable skip-list.
+Each member has a value and a "height": at every level up to that 
+height it keeps track of the next member at the same level 
+(links), and how many positions away that member is (widths). 
+Level 0 is the ordinary linked-list chain, and is still available 
+as next_item.
+"""
+    def __init__(self, value, height=1):
+        self.value = value
+        self.links = [None]*height
+        self.widths = [1]*height
+
+    @property
+    def next_item(self):
+        return self.links[0]
+
+    @next_item.setter
+    def next_item(self, value):
+        self.links[0] = value
+
+class SkipIndexedLinkedList(IndexedLinkedList):
+    """
+Extends IndexedLinkedList with an indexable skip-list layer, so 
+that retrieving, inserting or deleting a member at a numeric 
+index takes O(log n) instead of walking the whole chain.
+"""
+    # - The most levels that any member can have; 32 levels is 
+    #   plenty for lists of up to 2**32 members
+    max_height = 32
+
+    _chain_attributes = LinkedList._chain_attributes + (
+        '_head', '_height', '_size', '_tails'
+    )
+
+    def __init__(self, *members):
+        # - The head is a sentinel member that sits "before" index 0, 
+        #   and has a link at every level
+        self._head = SkipListMember(None, self.max_height)
+        self._height = 1
+        self._size = 0
+        # - The last member (and its index) at each level, which 
+        #   lets append skip the search. None means that they have 
+        #   to be recalculated before they are used
+        self._tails = None
+        LinkedList.__init__(self, *members)
+
+    @property
+    def first_member(self):
+        return self._head.links[0]
+
+    @first_member.setter
+    def first_member(self, value):
+        self._head.links[0] = value
+
+    def __len__(self):
+        return self._size
+
+    def _random_height(self):
+        height = 1
+        while height < self.max_height and random() < 0.5:
+            height += 1
+        return height
+
+    def _predecessors(self, index:int):
+        """
+Returns the last member at each level whose position is at or 
+before index, and the positions of those members, as a pair of 
+lists. The head's position is -1.
+"""
+        members = [self._head]*self.max_height
+        positions = [-1]*self.max_height
+        current_item = self._head
+        position = -1
+        for level in range(self._height - 1, -1, -1):
+            links = current_item.links
+            while (
+                links[level] is not None 
+                and position + current_item.widths[level] <= index
+            ):
+                position += current_item.widths[level]
+                current_item = links[level]
+                links = current_item.links
+            members[level] = current_item
+            positions[level] = position
+        return members, positions
+
+    def _normalize_index(self, index:int) -> int:
+        if index < 0:
+            index += self._size
+        if index < 0 or index >= self._size:
+            raise IndexError('list index out of range')
+        return index
+
+    def append(self, member):
+        height = self._random_height()
+        new_member = SkipListMember(member, height)
+        if self._tails is None:
+            self._tails = self._predecessors(self._size - 1)
+        tails, positions = self._tails
+        index = self._size
+        for level in range(height):
+            tails[level].links[level] = new_member
+            tails[level].widths[level] = index - positions[level]
+            tails[level] = new_member
+            positions[level] = index
+        if height > self._height:
+            self._height = height
+        self.last_member = new_member
+        self._size += 1
+
+    def insert(self, index:int, member):
+        """
+Inserts a new member before index, in the same fashion as 
+list.insert
+"""
+        if index < 0:
+            index = max(0, index + self._size)
+        if index >= self._size:
+            return self.append(member)
+        height = self._random_height()
+        new_member = SkipListMember(member, height)
+        members, positions = self._predecessors(index - 1)
+        for level in range(height):
+            previous = members[level]
+            gap = index - positions[level]
+            new_member.links[level] = previous.links[level]
+            new_member.widths[level] = previous.widths[level] - gap + 1
+            previous.links[level] = new_member
+            previous.widths[level] = gap
+        for level in range(height, self._height):
+            members[level].widths[level] += 1
+        if height > self._height:
+            self._height = height
+        self._size += 1
+        # - Members after the tails may have moved, so recalculate 
+        #   them on the next append
+        self._tails = None
+
+    def __getitem__(self, index:int):
+        index = self._normalize_index(index)
+        members, positions = self._predecessors(index)
+        return members[0]
+
+    def __delitem__(self, index:int):
+        index = self._normalize_index(index)
+        members, positions = self._predecessors(index - 1)
+        target = members[0].links[0]
+        for level in range(self._height):
+            previous = members[level]
+            if previous.links[level] is target:
+                previous.links[level] = target.links[level]
+                previous.widths[level] += target.widths[level] - 1
+            else:
+                previous.widths[level] -= 1
+        while (
+            self._height > 1 
+            and self._head.links[self._height - 1] is None
+        ):
+            self._height -= 1
+        self._size -= 1
+        if target is self.last_member:
+            if members[0] is self._head:
+                self.last_member = None
+            else:
+                self.last_member = members[0]
+        self._tails = None
+
 class ArrayMember:
     """
 Represents a member (or node) in a linked list.
-Each member has a value, and keeps track of what the 
-next member is.
+Each member has a key and a value, and keeps track of what the 
+previous and next members are.
 """
     def __init__(self, key, value):
         self.key = key
         self.value = value
+        self.previous_item=None
         self.next_item=None
 
     def __str__(self):
@@ -105,10 +337,60 @@ next member is.
             (self.key, self.value)
         )
 
-class AssociativeArray(LinkedList):
+class AssociativeArray(IndexedLinkedList):
+    """
+Provides a linked list of key/value members, with a hash-index of 
+keys kept alongside the chain, so that getting, setting and 
+deleting members by key are O(1), while iteration still follows 
+the order in which keys were first added.
+Members are supplied as (key, value) pairs.
+"""
+    _chain_attributes = LinkedList._chain_attributes + ('_index',)
+
+    def __init__(self, *members):
+        # - The hash-index: maps each key to its ArrayMember
+        self._index = {}
+        LinkedList.__init__(self, *members)
+
+    @classmethod
+    def from_items(cls, items):
+        """
+Bulk-loads a new instance from a mapping or an iterable of 
+(key, value) pairs, building the chain and the index in a 
+single pass
+"""
+        if hasattr(items, 'items'):
+            items = items.items()
+        result = cls()
+        index = result._index
+        last_member = None
+        for key, value in items:
+            current_item = index.get(key)
+            if current_item != None:
+                current_item.value = value
+                continue
+            new_member = ArrayMember(key, value)
+            index[key] = new_member
+            if last_member == None:
+                result.first_member = new_member
+            else:
+                new_member.previous_item = last_member
+                last_member.next_item = new_member
+            last_member = new_member
+        result.last_member = last_member
+        return result
 
     def append(self, member):
-        new_member = ArrayMember(member)
+        # - Appending a key that is already present replaces its 
+        #   value, but leaves it where it is in the chain, just 
+        #   like a dict does
+        key, value = member
+        current_item = self._index.get(key)
+        if current_item != None:
+            current_item.value = value
+            return
+        new_member = ArrayMember(key, value)
+        self._index[key] = new_member
         if self.last_member == None:
             # - Since self.last_member is None, we have to 
             #   create the first_member value
@@ -118,32 +400,622 @@ class AssociativeArray(LinkedList):
             self.last_member = new_member
         else:
             # - Since we have a last_member in this branch, 
-            #   we need to set its next_item to the new member:
+            #   we need to link it and the new member together:
+            new_member.previous_item = self.last_member
             self.last_member.next_item = new_member
             # - Then re-set self.last_member to point to the 
             #   *new* last_member:
             self.last_member = new_member
 
+    def __getstate__(self):
+        return {
+            'members':list(self.items()), 
+            'attributes':self._other_attributes()
+        }
+
+    def __len__(self):
+        return len(self._index)
+
+    def __contains__(self, key):
+        return key in self._index
+
     def __getitem__(self, index):
         if type(index) == int:
-            for i in range(0,index):
-                if i == 0:
-                    current_item = self.first_member
-                else:
-                    try:
-                        current_item = current_item.next_item
-                    except AttributeError:
-                        raise IndexError(
-                            'list index out of range'
-                        )
-            return current_item
-        else:
-            current_item = self.first_member
-            while current_item:
-                if current_item.key == index:
-                    return current_item
-                current_item = current_item.next_item
-            raise KeyError(index)
+            return IndexedLinkedList.__getitem__(self, index)
+        else:
+            try:
+                return self._index[index]
+            except KeyError:
+                raise KeyError(index)
+
+    def __setitem__(self, key, value):
+        self.append((key, value))
+
+    def __delitem__(self, key):
+        current_item = self._index.pop(key)
+        # - Unlink the member from its neighbors, or from the 
+        #   ends of the list if it has none
+        if current_item.previous_item == None:
+            self.first_member = current_item.next_item
+        else:
+            current_item.previous_item.next_item = \
+                current_item.next_item
+        if current_item.next_item == None:
+            self.last_member = current_item.previous_item
+        else:
+            current_item.next_item.previous_item = \
+                current_item.previous_item
+
+    def keys(self):
+        current_item = self.first_member
+        while current_item:
+            yield current_item.key
+            current_item = current_item.next_item
+
+    def items(self):
+        current_item = self.first_member
+        while current_item:
+            yield (current_item.key, current_item.value)
+            current_item = current_item.next_item
+
+
+class DoubleListMember(ListMember):
+    """
+Represents a member (or node) in a doubly linked list.
+Each member has a value, and keeps track of what the previous 
+and next members are.
+"""
+    def __init__(self, value):
+        ListMember.__init__(self, value)
+        self.previous_item=None
+        self.owner=None
+
+class _MemberOwner:
+    """
+Identifies the DoublyLinkedList that a DoubleListMember is linked 
+into. Splicing one list into another forwards the spliced list's 
+owner to the receiving list's, rather than updating every member 
+that moved, so a member's owner is found by following forward until 
+it is None.
+"""
+    __slots__ = ('forward',)
+
+    def __init__(self):
+        self.forward = None
+
+class DoublyLinkedList(LinkedList):
+    """
+Provides a Linked List whose members are linked in both 
+directions, so that members can be inserted or removed anywhere 
+in the chain, and whole lists spliced together, in O(1)
+"""
+    _chain_attributes = LinkedList._chain_attributes + (
+        '_size', '_owner'
+    )
+
+    def __init__(self, *members):
+        self._size = 0
+        self._owner = _MemberOwner()
+        LinkedList.__init__(self, *members)
+
+    def __len__(self):
+        return self._size
+
+    def _check_member(self, node, method:str):
+        # - Follows node's owner forward to the current one, pointing 
+        #   node and every owner passed along the way straight at it, 
+        #   so that later checks don't have to follow them again
+        if isinstance(node, DoubleListMember):
+            owner = node.owner
+        else:
+            owner = None
+        passed = []
+        while owner is not None and owner.forward is not None:
+            passed.append(owner)
+            owner = owner.forward
+        for passed_owner in passed:
+            passed_owner.forward = owner
+        if owner is not self._owner:
+            raise ValueError(
+                '%s.%s expects a member of this list, but was passed '
+                '%s' % (self.__class__.__name__, method, node)
+            )
+        node.owner = owner
+
+    def __reversed__(self):
+        current_item = self.last_member
+        while current_item is not None:
+            yield current_item
+            current_item = current_item.previous_item
+
+    def _link(self, new_member, previous_item, next_item):
+        # - Connects new_member between previous_item and 
+        #   next_item, either of which can be None at the ends
+        new_member.previous_item = previous_item
+        new_member.next_item = next_item
+        new_member.owner = self._owner
+        if previous_item is None:
+            self.first_member = new_member
+        else:
+            previous_item.next_item = new_member
+        if next_item is None:
+            self.last_member = new_member
+        else:
+            next_item.previous_item = new_member
+        self._size += 1
+        return new_member
+
+    def append(self, member):
+        return self._link(
+            DoubleListMember(member), self.last_member, None
+        )
+
+    def prepend(self, member):
+        return self._link(
+            DoubleListMember(member), None, self.first_member
+        )
+
+    def insert_before(self, node, member):
+        """
+Inserts a new member with the value supplied before node, and 
+returns the new member
+"""
+        self._check_member(node, 'insert_before')
+        return self._link(
+            DoubleListMember(member), node.previous_item, node
+        )
+
+    def insert_after(self, node, member):
+        """
+Inserts a new member with the value supplied after node, and 
+returns the new member
+"""
+        self._check_member(node, 'insert_after')
+        return self._link(
+            DoubleListMember(member), node, node.next_item
+        )
+
+    def remove(self, node):
+        """Unlinks node from the list, and returns its value"""
+        self._check_member(node, 'remove')
+        if node.previous_item is None:
+            self.first_member = node.next_item
+        else:
+            node.previous_item.next_item = node.next_item
+        if node.next_item is None:
+            self.last_member = node.previous_item
+        else:
+            node.next_item.previous_item = node.previous_item
+        node.previous_item = None
+        node.next_item = None
+        node.owner = None
+        self._size -= 1
+        return node.value
+
+    def splice(self, other, after=None):
+        """
+Moves all of the members of another DoublyLinkedList into this 
+one, after the node supplied (or at the end if no node is 
+supplied), by relinking the ends of the two chains rather than 
+copying any members. The other list is left empty.
+"""
+        if other is self:
+            raise ValueError('A list cannot be spliced into itself')
+        if after is not None:
+            self._check_member(after, 'splice')
+        if other.first_member is None:
+            return
+        if after is None:
+            after = self.last_member
+        if after is None:
+            following = self.first_member
+        else:
+            following = after.next_item
+        other.first_member.previous_item = after
+        if after is None:
+            self.first_member = other.first_member
+        else:
+            after.next_item = other.first_member
+        other.last_member.next_item = following
+        if following is None:
+            self.last_member = other.last_member
+        else:
+            following.previous_item = other.last_member
+        self._size += other._size
+        # - Every member that moved now belongs to this list
+        other._owner.forward = self._owner
+        other._owner = _MemberOwner()
+        other.first_member = None
+        other.last_member = None
+        other._size = 0
+
+    def __iadd__(self, other):
+        # - Concatenation with += relinks, and empties other
+        self.splice(other)
+        return self
+
+
+class CompactListMember:
+    """
+Represents a member of a CompactLinkedList. It does not hold the 
+member's value or its link to the next member itself: it is a 
+lightweight view onto one position in the list's arrays, created 
+on demand. It has the same value and next_item attributes as a 
+ListMember, but doesn't subclass it, since ListMember instances 
+have a __dict__, which would defeat its __slots__.
+"""
+    __slots__ = ('_owner', '_position')
+
+    __str__ = ListMember.__str__
+
+    def __init__(self, owner, position):
+        self._owner = owner
+        self._position = position
+
+    @property
+    def value(self):
+        return self._owner._values[self._position]
+
+    @value.setter
+    def value(self, value):
+        self._owner._values[self._position] = value
+
+    @property
+    def next_item(self):
+        return self._owner._member(
+            self._owner._next_items[self._position]
+        )
+
+class CompactLinkedList(LinkedList):
+    """
+Provides a Linked List whose members are stored as a 
+struct-of-arrays -- a list of values, and an array of integer 
+next-member positions -- instead of one ListMember object per 
+member, which takes a fraction of the memory.
+"""
+    _chain_attributes = LinkedList._chain_attributes + (
+        '_values', '_next_items', '_first', '_last'
+    )
+
+    def __init__(self, *members):
+        self._values = list(members)
+        # - Each member's next_item is the position of the next 
+        #   member in self._values, or -1 for the last member
+        self._next_items = array('q', range(1, len(members) + 1))
+        if members:
+            self._next_items[-1] = -1
+            self._first = 0
+            self._last = len(members) - 1
+        else:
+            self._first = -1
+            self._last = -1
+
+    def _member(self, position:int):
+        if position < 0:
+            return None
+        return CompactListMember(self, position)
+
+    @property
+    def first_member(self):
+        return self._member(self._first)
+
+    @property
+    def last_member(self):
+        return self._member(self._last)
+
+    def __len__(self):
+        return len(self._values)
+
+    def append(self, member):
+        position = len(self._values)
+        self._values.append(member)
+        self._next_items.append(-1)
+        if self._last < 0:
+            self._first = position
+        else:
+            self._next_items[self._last] = position
+        self._last = position
+
+    def values(self):
+        values = self._values
+        next_items = self._next_items
+        position = self._first
+        while position >= 0:
+            yield values[position]
+            position = next_items[position]
+
+
+class UnrolledBlock:
+    """
+Represents a block of member values in an unrolled linked list, 
+and keeps track of what the next block is
+"""
+    __slots__ = ('values', 'next_item')
+
+    def __init__(self, values):
+        self.values = values
+        self.next_item = None
+
+class UnrolledListMember:
+    """
+Represents a member of an UnrolledLinkedList: a lightweight view 
+onto one value in one of the list's blocks, created on demand. As 
+with CompactListMember, it doesn't subclass ListMember, so that its 
+__slots__ aren't defeated by a __dict__.
+"""
+    __slots__ = ('_block', '_offset')
+
+    __str__ = ListMember.__str__
+
+    def __init__(self, block, offset):
+        self._block = block
+        self._offset = offset
+
+    @property
+    def value(self):
+        return self._block.values[self._offset]
+
+    @value.setter
+    def value(self, value):
+        self._block.values[self._offset] = value
+
+    @property
+    def next_item(self):
+        if self._offset + 1 < len(self._block.values):
+            return UnrolledListMember(self._block, self._offset + 1)
+        if self._block.next_item is None:
+            return None
+        return UnrolledListMember(self._block.next_item, 0)
+
+class UnrolledLinkedList(LinkedList):
+    """
+Provides an unrolled Linked List, where each link in the chain is 
+a block holding up to block_size values rather than a single 
+member. Far fewer objects are created and traversed than with 
+one ListMember per value.
+"""
+    def __init__(self, *members, block_size:int=64):
+        if block_size < 1:
+            raise ValueError(
+                '%s expects a block_size of at least 1, but was '
+                'passed %s' % (self.__class__.__name__, block_size)
+            )
+        self.block_size = block_size
+        self._first_block = None
+        self._last_block = None
+        self._size = 0
+        for start in range(0, len(members), block_size):
+            self._append_block(list(members[start:start + block_size]))
+        self._size = len(members)
+
+    _chain_attributes = LinkedList._chain_attributes + (
+        'block_size', '_first_block', '_last_block', '_size'
+    )
+
+    def __getstate__(self):
+        state = LinkedList.__getstate__(self)
+        state['block_size'] = self.block_size
+        return state
+
+    def __setstate__(self, state):
+        self.__init__(
+            *state['members'], block_size=state['block_size']
+        )
+        self.__dict__.update(state['attributes'])
+
+    def _append_block(self, values):
+        new_block = UnrolledBlock(values)
+        if self._last_block is None:
+            self._first_block = new_block
+        else:
+            self._last_block.next_item = new_block
+        self._last_block = new_block
+        return new_block
+
+    @property
+    def first_member(self):
+        if self._first_block is None:
+            return None
+        return UnrolledListMember(self._first_block, 0)
+
+    @property
+    def last_member(self):
+        if self._last_block is None:
+            return None
+        return UnrolledListMember(
+            self._last_block, len(self._last_block.values) - 1
+        )
+
+    def __len__(self):
+        return self._size
+
+    def append(self, member):
+        last_block = self._last_block
+        if (
+            last_block is None 
+            or len(last_block.values) >= self.block_size
+        ):
+            self._append_block([member])
+        else:
+            last_block.values.append(member)
+        self._size += 1
+
+    def __iter__(self):
+        # - Walking the blocks directly creates each member-view 
+        #   once, instead of through a LinkedListCursor following 
+        #   next_item, which creates another view on every hop
+        block = self._first_block
+        while block is not None:
+            for offset in range(len(block.values)):
+                yield UnrolledListMember(block, offset)
+            block = block.next_item
+
+    def _block_values(self):
+        block = self._first_block
+        while block is not None:
+            yield block.values
+            block = block.next_item
+
+    def values(self):
+        # - Chaining the blocks' value-lists together keeps the 
+        #   per-value iteration out of Python code entirely
+        return chain.from_iterable(self._block_values())
+
+
+def benchmark_indexed_lookup(sizes=(10000, 100000, 1000000), lookups=100):
+    """
+Compares the time taken to retrieve members by index from an 
+IndexedLinkedList (walking the chain) and a SkipIndexedLinkedList
+"""
+    print('Indexed lookup benchmark (%d random lookups)' % lookups)
+    for size in sizes:
+        indexes = [randrange(size) for i in range(lookups)]
+        for list_class in (IndexedLinkedList, SkipIndexedLinkedList):
+            start = perf_counter()
+            my_list = list_class(*range(size))
+            built = perf_counter() - start
+            start = perf_counter()
+            for index in indexes:
+                assert my_list[index].value == index
+            elapsed = perf_counter() - start
+            print(
+                '+- %-22s %9d members: build %8.3fs, '
+                '%10.2f us/lookup' % (
+                    list_class.__name__, size, built, 
+                    elapsed / lookups * 1000000
+                )
+            )
+
+def benchmark_member_memory(sizes=(100000, 1000000)):
+    """
+Compares the memory allocated per member by LinkedList and 
+CompactLinkedList, not counting the member values themselves
+"""
+    print('Member memory benchmark')
+    for size in sizes:
+        values = list(range(size))
+        for list_class in (LinkedList, CompactLinkedList):
+            tracemalloc.start()
+            my_list = list_class(*values)
+            allocated = tracemalloc.get_traced_memory()[0]
+            tracemalloc.stop()
+            print(
+                '+- %-22s %9d members: %8.1f bytes/member' % 
+                (list_class.__name__, size, allocated / size)
+            )
+            del my_list
+
+def benchmark_iteration(size=1000000, repeats=3):
+    """
+Compares iteration throughput over a LinkedList's members, over its 
+values, and over a plain list of the same values
+"""
+    print('Iteration benchmark (%d members)' % size)
+    values = list(range(size))
+    my_list = LinkedList(*values)
+    compact_list = CompactLinkedList(*values)
+    candidates = (
+        ('list', lambda: values), 
+        ('LinkedList', lambda: my_list), 
+        ('LinkedList.values()', my_list.values), 
+        ('CompactLinkedList.values()', compact_list.values), 
+    )
+    for name, source in candidates:
+        best = None
+        for i in range(repeats):
+            start = perf_counter()
+            for item in source():
+                pass
+            elapsed = perf_counter() - start
+            if best == None or elapsed < best:
+                best = elapsed
+        print(
+            '+- %-26s %12.0f items/sec' % (name, size / best)
+        )
+
+def benchmark_unrolled(
+    size=1000000, block_sizes=(16, 64, 256), repeats=3
+):
+    """
+Compares append and iteration throughput (over values(), and over 
+the members themselves), and memory per member, of a LinkedList and 
+UnrolledLinkedLists with various block sizes
+"""
+    print('Unrolled linked list benchmark (%d members)' % size)
+    candidates = [('LinkedList', LinkedList)] + [
+        (
+            'UnrolledLinkedList(%d)' % block_size, 
+            lambda block_size=block_size: 
+                UnrolledLinkedList(block_size=block_size)
+        ) for block_size in block_sizes
+    ]
+    for name, factory in candidates:
+        best_append = best_iterate = best_members = None
+        for i in range(repeats):
+            start = perf_counter()
+            my_list = factory()
+            append = my_list.append
+            for value in range(size):
+                append(value)
+            elapsed = perf_counter() - start
+            if best_append == None or elapsed < best_append:
+                best_append = elapsed
+            start = perf_counter()
+            for value in my_list.values():
+                pass
+            elapsed = perf_counter() - start
+            if best_iterate == None or elapsed < best_iterate:
+                best_iterate = elapsed
+            start = perf_counter()
+            for member in my_list:
+                pass
+            elapsed = perf_counter() - start
+            if best_members == None or elapsed < best_members:
+                best_members = elapsed
+            del my_list
+        # - Memory is measured separately, since tracing 
+        #   allocations slows the appends down
+        values = list(range(size))
+        tracemalloc.start()
+        my_list = factory()
+        for value in values:
+            my_list.append(value)
+        allocated = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+        del my_list
+        print(
+            '+- %-23s append %11.0f/sec, values %11.0f/sec, '
+            'members %11.0f/sec, %6.1f bytes/member' % (
+                name, size / best_append, size / best_iterate, 
+                size / best_members, allocated / size
+            )
+        )
+
+def benchmark_pickling(size=1000000):
+    """
+Reports the pickled size, and the time taken to pickle, unpickle 
+and deep-copy, a LinkedList, compared to a plain list
+"""
+    print('Pickling benchmark (%d members)' % size)
+    values = list(range(size))
+    for name, source in (
+        ('list', values), ('LinkedList', LinkedList(*values)), 
+        ('DoublyLinkedList', DoublyLinkedList(*values)), 
+    ):
+        start = perf_counter()
+        pickled = pickle.dumps(source, pickle.HIGHEST_PROTOCOL)
+        dumped = perf_counter() - start
+        start = perf_counter()
+        pickle.loads(pickled)
+        loaded = perf_counter() - start
+        start = perf_counter()
+        deepcopy(source)
+        copied = perf_counter() - start
+        print(
+            '+- %-17s %10d bytes, dumps %.3fs, loads %.3fs, '
+            'deepcopy %.3fs' % 
+            (name, len(pickled), dumped, loaded, copied)
+        )
 
 
 if __name__ == '__main__':
@@ -168,6 +1040,13 @@ if __name__ == '__main__':
     filter_results = [str(i) for i in my_list if i.value % 2]
     print(filter_results)
 
+    print('Nested iteration:')
+    print([(i.value, j.value) for i in my_list for j in my_list])
+
+    print('Reversed iteration, and values:')
+    print([str(i) for i in reversed(my_list)])
+    print(list(my_list.values()))
+
     print('IndexedLinkedList example')
     my_list = IndexedLinkedList(1,2,3)
     print(my_list)
@@ -177,3 +1056,65 @@ if __name__ == '__main__':
         print(current_item)
         current_item = current_item.next_item
     print(my_list[1])
+
+    print('SkipIndexedLinkedList example')
+    my_list = SkipIndexedLinkedList(1,2,3)
+    my_list.insert(1, 1.5)
+    print([str(i) for i in my_list])
+    print(my_list[1])
+    print(my_list[-1])
+    del my_list[0]
+    print([str(i) for i in my_list])
+    my_list.append(4)
+    print(my_list.last_member)
+
+    print('AssociativeArray example')
+    my_array = AssociativeArray(('one', 1), ('two', 2), ('three', 3))
+    print(my_array['two'])
+    my_array['four'] = 4
+    my_array['one'] = 'uno'
+    del my_array['two']
+    print(list(my_array.items()))
+    print('three' in my_array, 'two' in my_array, len(my_array))
+    my_array = AssociativeArray.from_items({'a':1, 'b':2, 'c':3})
+    print(list(my_array.keys()))
+
+    print('CompactLinkedList example')
+    my_list = CompactLinkedList(1,2,3)
+    my_list.append(4)
+    for i in my_list:
+        print(i)
+    print(my_list.last_member)
+
+    print('DoublyLinkedList example')
+    my_list = DoublyLinkedList(1,2,4)
+    second = my_list.first_member.next_item
+    my_list.insert_after(second, 3)
+    my_list.insert_before(my_list.first_member, 0)
+    print(list(my_list.values()))
+    my_list.remove(second)
+    print(list(my_list.values()))
+    my_list += DoublyLinkedList(5,6)
+    my_list.splice(DoublyLinkedList('a','b'), my_list.first_member)
+    print(list(my_list.values()), len(my_list))
+    print([str(i) for i in reversed(my_list)])
+
+    print('UnrolledLinkedList example')
+    my_list = UnrolledLinkedList(1,2,3,4,5, block_size=2)
+    my_list.append(6)
+    print([str(i) for i in my_list])
+    print(list(my_list.values()), len(my_list), my_list.last_member)
+
+    print('Pickling and copying a long LinkedList')
+    my_list = LinkedList(*range(100000))
+    copied_list = pickle.loads(pickle.dumps(my_list))
+    print(copied_list.last_member)
+    copied_list = deepcopy(my_list)
+    print(copied_list.last_member)
+
+    if '--benchmark' in sys.argv:
+        benchmark_indexed_lookup()
+        benchmark_member_memory()
+        benchmark_iteration()
+        benchmark_unrolled()
+        benchmark_pickling()
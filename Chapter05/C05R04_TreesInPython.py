@@ -4,23 +4,47 @@ The complete code of Ch. 5, Recipe 5 --
 Creating Data-trees in Python
 """
 
-class Node:
-    """
-Provides a (very) simple tree data-structure, where each node 
-is allowed to have a "left" and "right" node (also Node 
-instances)
+import io
+import json
+import pickle
+import re
+import struct
+import sys
+import tracemalloc
+
+from array import array
+from bisect import bisect_left, bisect_right
+from collections import deque
+from copy import deepcopy
+from random import randrange, shuffle
+from time import perf_counter
+
+class SlottedNode:
     """
+Provides the fast path for Node: the same tree data-structure, with 
+its data and child-nodes kept in __slots__, so that no other 
+attributes can be set on its instances, which take less memory
+"""
+
+    # - Every node has all of its slots set when it's created, so 
+    #   reading a missing child is a plain attribute-read that 
+    #   returns None, rather than an AttributeError raised and 
+    #   caught. Code in this module that walks or rebuilds trees uses 
+    #   the slots directly, skipping the properties altogether
+    __slots__ = ('data', '_left_node', '_right_node')
+
+    # - Checking the type of child-nodes as they are set can be 
+    #   turned off (for a subclass, or for Node itself) when building 
+    #   trees that are known to be well-formed
+    check_types = True
 
     @property
     def left_node(self):
-        try:
-            return self._left_node
-        except AttributeError:
-            return None
+        return self._left_node
 
     @left_node.setter
     def left_node(self, value):
-        if value != None:
+        if self.check_types and value != None:
             if not isinstance(value, self.__class__):
                 raise TypeError(
                     '%s.left_node expects an instance of Node, '
@@ -33,21 +57,15 @@ instances)
 
     @left_node.deleter
     def left_node(self):
-        try:
-            del self._left_node
-        except AttributeError:
-            pass
+        self._left_node = None
 
     @property
     def right_node(self):
-        try:
-            return self._right_node
-        except AttributeError:
-            return None
+        return self._right_node
 
     @right_node.setter
     def right_node(self, value):
-        if value != None:
+        if self.check_types and value != None:
             if not isinstance(value, self.__class__):
                 raise TypeError(
                     '%s.right_node expects an instance of Node, '
@@ -56,52 +74,1182 @@ instances)
                         type(value).__name__
                     )
                 )
-            self._right_node = value
+        self._right_node = value
 
     @right_node.deleter
     def right_node(self):
-        try:
-            del self._right_node
-        except AttributeError:
-            pass
+        self._right_node = None
 
     def __init__(self, data, left_node=None, right_node=None):
         self.data = data
-        self.left_node = left_node
-        self.right_node = right_node
+        self._left_node = None
+        self._right_node = None
+        if left_node != None:
+            self.left_node = left_node
+        if right_node != None:
+            self.right_node = right_node
 
     def __str__(self):
         return 'Node(data=%s)' % self.data
 
+    # - Pickling and copying would otherwise recurse through every 
+    #   level of child-nodes, so the tree is flattened into a 
+    #   pre-order list of data-values, with one byte per node 
+    #   recording which children it has (1 = left, 2 = right), 
+    #   and rebuilt from that with an explicit stack. Trees can mix 
+    #   node-classes, and nodes with a __dict__ can carry other 
+    #   attributes, so each node's class and attributes (or None, if 
+    #   it has none) are kept in the same pre-order too -- though 
+    #   only when some node needs them, so that the usual case of a 
+    #   single class with no other attributes stays as compact
+    def __getstate__(self):
+        data = []
+        shape = bytearray()
+        classes = []
+        attributes = []
+        pending = [self]
+        while pending:
+            node = pending.pop()
+            left_node = node._left_node
+            right_node = node._right_node
+            data.append(node.data)
+            classes.append(node.__class__)
+            attributes.append(getattr(node, '__dict__', None) or None)
+            shape.append(
+                (left_node != None) | (right_node != None) << 1
+            )
+            if right_node != None:
+                pending.append(right_node)
+            if left_node != None:
+                pending.append(left_node)
+        state = {'data':data, 'shape':bytes(shape)}
+        if any(node_class != self.__class__ for node_class in classes):
+            state['classes'] = classes
+        if any(attributes):
+            state['attributes'] = attributes
+        return state
+
+    def __setstate__(self, state):
+        data = state['data']
+        shape = state['shape']
+        classes = state.get('classes')
+        attributes = state.get('attributes')
+        self.__init__(data[0])
+        # - Each pending entry is a (parent, attribute-name) slot 
+        #   that the next node in pre-order will fill
+        pending = []
+        for index in range(len(data)):
+            if index == 0:
+                node = self
+            else:
+                parent, attribute = pending.pop()
+                if classes == None:
+                    node = self.__class__(data[index])
+                else:
+                    node = classes[index](data[index])
+                setattr(parent, attribute, node)
+            if attributes != None and attributes[index] != None:
+                node.__dict__.update(attributes[index])
+            if shape[index] & 2:
+                pending.append((node, '_right_node'))
+            if shape[index] & 1:
+                pending.append((node, '_left_node'))
+
+    # - Serializing to (and from) the nested-dict layout of 
+    #   example_as_dict, below, as JSON text, or to a compact binary 
+    #   pre-order encoding. Both work a node at a time, with explicit 
+    #   stacks, and write (or read) the stream in chunks, so neither 
+    #   the whole dict nor the whole document is ever built
+
+    def to_json(self, stream, chunk_size:int=4096):
+        """
+Writes the tree as JSON to the text stream, in the nested-dict 
+layout of example_as_dict, flushing every chunk_size pieces
+"""
+        parts = ['{"root": ']
+        pending = [self]
+        while pending:
+            item = pending.pop()
+            if isinstance(item, str):
+                parts.append(item)
+                continue
+            parts.append('{"value": %s' % json.dumps(item.data))
+            pending.append('}')
+            if item._right_node != None:
+                pending.append(item._right_node)
+                pending.append(', "right": ')
+            if item._left_node != None:
+                pending.append(item._left_node)
+                pending.append(', "left": ')
+            if len(parts) >= chunk_size:
+                stream.write(''.join(parts))
+                parts = []
+        parts.append('}')
+        stream.write(''.join(parts))
+
+    @classmethod
+    def from_json(cls, stream):
+        """
+Reads a tree written by to_json (or any JSON in the same layout, 
+where a missing or empty child-object means there is no child) 
+from the text stream, returning its root, or None if it's empty
+"""
+        reader = _JsonStreamReader(stream)
+        reader.expect('{')
+        reader.expect_key('root')
+        reader.expect('{')
+        if reader.peek() == '}':
+            reader.next_char()
+            reader.expect('}')
+            return None
+        root = cls(None)
+        # - The nodes whose objects have been opened but not closed 
+        #   yet, innermost last
+        pending = [root]
+        while pending:
+            node = pending[-1]
+            key = reader.key()
+            if key == 'value':
+                node.data = reader.value()
+            elif key == 'left' or key == 'right':
+                reader.expect('{')
+                if reader.peek() == '}':
+                    reader.next_char()
+                else:
+                    child = cls(None)
+                    setattr(node, '_%s_node' % key, child)
+                    pending.append(child)
+                    continue
+            else:
+                raise ValueError(
+                    '%s.from_json expects "value", "left" or "right", '
+                    'but found "%s"' % (cls.__name__, key)
+                )
+            # - Closing braces end the current node's object, and each 
+            #   closed node is the last member of its parent
+            while pending:
+                char = reader.next_char()
+                if char == ',':
+                    break
+                if char != '}':
+                    raise ValueError(
+                        '%s.from_json expects "," or "}", but found '
+                        '"%s"' % (cls.__name__, char)
+                    )
+                pending.pop()
+        reader.expect('}')
+        return root
+
+    def to_binary(self, stream, chunk_size:int=4096):
+        """
+Writes the tree to the binary stream in pre-order, one header byte 
+per node (holding which children it has and the type of its data) 
+followed by its data, flushing every chunk_size nodes
+"""
+        parts = []
+        pending = [self]
+        while pending:
+            node = pending.pop()
+            left_node = node._left_node
+            right_node = node._right_node
+            flags = (left_node != None) | (right_node != None) << 1
+            parts.append(_binary_node(node.data, flags))
+            if right_node != None:
+                pending.append(right_node)
+            if left_node != None:
+                pending.append(left_node)
+            if len(parts) >= chunk_size:
+                stream.write(b''.join(parts))
+                parts = []
+        stream.write(b''.join(parts))
+
+    @classmethod
+    def from_binary(cls, stream):
+        """
+Reads a tree written by to_binary from the binary stream, returning 
+its root
+"""
+        root = None
+        # - As in __setstate__, each pending entry is a (parent, 
+        #   attribute-name) slot for the next node in pre-order
+        pending = []
+        while root == None or pending:
+            header = _read_exactly(stream, 1)[0]
+            kind = header >> 2
+            if kind == _BINARY_NONE:
+                data = None
+            elif kind == _BINARY_FALSE:
+                data = False
+            elif kind == _BINARY_TRUE:
+                data = True
+            elif kind == _BINARY_INT:
+                data = _INT64.unpack(_read_exactly(stream, 8))[0]
+            elif kind == _BINARY_FLOAT:
+                data = _FLOAT64.unpack(_read_exactly(stream, 8))[0]
+            else:
+                size = _LENGTH.unpack(_read_exactly(stream, 4))[0]
+                data = _read_exactly(stream, size)
+                if kind == _BINARY_STR:
+                    data = data.decode('utf-8')
+                elif kind == _BINARY_BIG_INT:
+                    data = int(data)
+                elif kind != _BINARY_BYTES:
+                    raise ValueError(
+                        '%s.from_binary found an unknown data-type '
+                        '(%d)' % (cls.__name__, kind)
+                    )
+            node = cls(data)
+            if root == None:
+                root = node
+            else:
+                parent, attribute = pending.pop()
+                setattr(parent, attribute, node)
+            if header & 2:
+                pending.append((node, '_right_node'))
+            if header & 1:
+                pending.append((node, '_left_node'))
+        return root
+
     def print_tree(self, indent=0):
-        if not indent:
-            print(self)
+        pending = [(self, indent)]
+        while pending:
+            node, indent = pending.pop()
+            if not indent:
+                print(node)
+            else:
+                print(' '*(3 * (indent-1)) + '+- %s' % node)
+            if node._right_node:
+                pending.append((node._right_node, indent+1))
+            if node._left_node:
+                pending.append((node._left_node, indent+1))
+
+    # - The traversals below keep the nodes still to be visited on 
+    #   an explicit stack (or queue, for breadth-first), rather than 
+    #   in nested generators, so each node is yielded directly, in 
+    #   O(n) overall, and no depth of tree can hit the recursion 
+    #   limit
+
+    def pre_order(self):
+        """Yields each node before its left, then right, sub-trees"""
+        pending = [self]
+        while pending:
+            node = pending.pop()
+            yield node
+            if node._right_node:
+                pending.append(node._right_node)
+            if node._left_node:
+                pending.append(node._left_node)
+
+    def in_order(self):
+        """Yields each node between its left and right sub-trees"""
+        pending = []
+        node = self
+        while node or pending:
+            while node:
+                pending.append(node)
+                node = node._left_node
+            node = pending.pop()
+            yield node
+            node = node._right_node
+
+    def post_order(self):
+        """Yields each node after its left, then right, sub-trees"""
+        # - A node on top of the stack is yielded once its right 
+        #   sub-tree (if any) is done, which is known when the last 
+        #   node yielded was its right child
+        pending = []
+        node = self
+        last_node = None
+        while node or pending:
+            if node:
+                pending.append(node)
+                node = node._left_node
+                continue
+            right_node = pending[-1]._right_node
+            if right_node and right_node is not last_node:
+                node = right_node
+            else:
+                last_node = pending.pop()
+                yield last_node
+
+    def breadth_first(self):
+        """Yields the nodes one level at a time, left to right"""
+        pending = deque([self])
+        while pending:
+            node = pending.popleft()
+            yield node
+            if node._left_node:
+                pending.append(node._left_node)
+            if node._right_node:
+                pending.append(node._right_node)
+
+    def traverse(self):
+        return self.pre_order()
+
+    def __iter__(self):
+        return self.pre_order()
+
+class Node(SlottedNode):
+    """
+Provides a (very) simple tree data-structure, where each node 
+is allowed to have a "left" and "right" node (also Node 
+instances)
+    """
+    # - Node declares no __slots__ of its own, so, as ever, other 
+    #   attributes can be set on its instances
+
+class _JsonStreamReader:
+    """
+Reads the punctuation and values of a JSON document from a text 
+stream a chunk at a time, for Node.from_json
+"""
+    _next_char = re.compile(r'[ \t\r\n]*([^ \t\r\n])')
+    _key = re.compile(r'[ \t\r\n]*"([^"\\]*)"[ \t\r\n]*:')
+    _delimiters = (',', ':', '}', ']', ' ', '\t', '\r', '\n')
+
+    def __init__(self, stream, chunk_size:int=65536):
+        self.stream = stream
+        self.chunk_size = chunk_size
+        self.buffer = ''
+        self.position = 0
+        self._decoder = json.JSONDecoder()
+
+    def _fill(self) -> bool:
+        chunk = self.stream.read(self.chunk_size)
+        if not chunk:
+            return False
+        self.buffer = self.buffer[self.position:] + chunk
+        self.position = 0
+        return True
+
+    def next_char(self) -> str:
+        """
+Consumes and returns the next character that isn't whitespace, or 
+an empty string at the end of the stream
+"""
+        while True:
+            match = self._next_char.match(self.buffer, self.position)
+            if match:
+                self.position = match.end()
+                return match.group(1)
+            if not self._fill():
+                self.position = len(self.buffer)
+                return ''
+
+    def peek(self) -> str:
+        char = self.next_char()
+        self.position -= len(char)
+        return char
+
+    def expect(self, expected:str):
+        char = self.next_char()
+        if char != expected:
+            raise ValueError(
+                'Expected "%s" in JSON, but found "%s"' % 
+                (expected, char)
+            )
+
+    def key(self) -> str:
+        """
+Consumes and returns the next object-key, and the colon after it
+"""
+        match = self._key.match(self.buffer, self.position)
+        if match:
+            self.position = match.end()
+            return match.group(1)
+        # - Keys with escapes in them, or that are cut off at the end 
+        #   of the buffer, are read as any other value
+        key = self.value()
+        self.expect(':')
+        return key
+
+    def expect_key(self, expected:str):
+        key = self.key()
+        if key != expected:
+            raise ValueError(
+                'Expected the key "%s" in JSON, but found "%s"' % 
+                (expected, key)
+            )
+
+    def value(self):
+        """Consumes and returns the next JSON value"""
+        self.peek()
+        while True:
+            try:
+                value, end = self._decoder.raw_decode(
+                    self.buffer, self.position
+                )
+            except json.JSONDecodeError:
+                # - The value may be cut off at the end of the buffer
+                if self._fill():
+                    continue
+                raise
+            # - A value not followed by a delimiter in the buffer
+            #   (a number cut off at "1.5" or "1.5e", say) may carry 
+            #   on in the next chunk
+            if (
+                self.buffer[end:end + 1] not in self._delimiters 
+                and self._fill()
+            ):
+                continue
+            self.position = end
+            return value
+
+# - Binary encoding of nodes: the data-type codes, kept in the upper 
+#   bits of each node's header byte, and the formats of their data
+_BINARY_NONE = 0
+_BINARY_FALSE = 1
+_BINARY_TRUE = 2
+_BINARY_INT = 3
+_BINARY_FLOAT = 4
+_BINARY_STR = 5
+_BINARY_BYTES = 6
+_BINARY_BIG_INT = 7
+
+_INT64 = struct.Struct('<q')
+_FLOAT64 = struct.Struct('<d')
+_LENGTH = struct.Struct('<I')
+
+def _binary_node(data, flags:int) -> bytes:
+    """
+Returns the binary encoding of a node with data, whose children are 
+described by flags (1 = left, 2 = right)
+"""
+    data_type = type(data)
+    if data is None:
+        return bytes((_BINARY_NONE << 2 | flags,))
+    if data_type is bool:
+        if data:
+            return bytes((_BINARY_TRUE << 2 | flags,))
+        return bytes((_BINARY_FALSE << 2 | flags,))
+    if data_type is int and -2**63 <= data < 2**63:
+        return bytes((_BINARY_INT << 2 | flags,)) + _INT64.pack(data)
+    if data_type is float:
+        return (
+            bytes((_BINARY_FLOAT << 2 | flags,)) + _FLOAT64.pack(data)
+        )
+    if data_type is int:
+        data = str(data).encode('ascii')
+        kind = _BINARY_BIG_INT
+    elif data_type is str:
+        data = data.encode('utf-8')
+        kind = _BINARY_STR
+    elif data_type is bytes:
+        kind = _BINARY_BYTES
+    else:
+        raise TypeError(
+            'Node.to_binary can only encode None, bool, int, float, '
+            'str and bytes data, but was passed "%s" (%s)' % 
+            (data, data_type.__name__)
+        )
+    return bytes((kind << 2 | flags,)) + _LENGTH.pack(len(data)) + data
+
+def _read_exactly(stream, size:int) -> bytes:
+    data = stream.read(size)
+    if len(data) != size:
+        raise ValueError(
+            'Expected %d more bytes of binary Node data, but found '
+            '%d' % (size, len(data))
+        )
+    return data
+
+class BalancedTreeNode(SlottedNode):
+    """
+Provides a Node for a BalancedTree, which also keeps the key its 
+data is ordered by, and the height of the sub-tree it's the root of
+"""
+    __slots__ = ('key', 'height')
+
+    def __init__(self, data, key=None, left_node=None, right_node=None):
+        SlottedNode.__init__(self, data, left_node, right_node)
+        self.key = key
+        self.height = 1
+
+    # - SlottedNode's flattened state doesn't keep the slots added 
+    #   here, so the keys and heights are added, as lists in the 
+    #   same pre-order, and put back once the tree has been rebuilt
+
+    def __getstate__(self):
+        state = SlottedNode.__getstate__(self)
+        state['keys'] = []
+        state['heights'] = []
+        for node in self.pre_order():
+            state['keys'].append(node.key)
+            state['heights'].append(node.height)
+        return state
+
+    def __setstate__(self, state):
+        SlottedNode.__setstate__(self, state)
+        for node, key, height in zip(
+            self.pre_order(), state['keys'], state['heights']
+        ):
+            node.key = key
+            node.height = height
+
+def _height(node):
+    if node == None:
+        return 0
+    return node.height
+
+def _update_height(node):
+    node.height = 1 + max(
+        _height(node._left_node), _height(node._right_node)
+    )
+
+def _rotate_left(node):
+    pivot = node._right_node
+    node._right_node = pivot._left_node
+    pivot._left_node = node
+    _update_height(node)
+    _update_height(pivot)
+    return pivot
+
+def _rotate_right(node):
+    pivot = node._left_node
+    node._left_node = pivot._right_node
+    pivot._right_node = node
+    _update_height(node)
+    _update_height(pivot)
+    return pivot
+
+def _rebalanced(node):
+    """
+Returns the root of node's sub-tree once any imbalance of more than 
+one level between its left and right sides has been rotated away
+"""
+    _update_height(node)
+    balance = _height(node._left_node) - _height(node._right_node)
+    if balance > 1:
+        left_node = node._left_node
+        if (
+            _height(left_node._left_node) 
+            < _height(left_node._right_node)
+        ):
+            node._left_node = _rotate_left(left_node)
+        return _rotate_right(node)
+    if balance < -1:
+        right_node = node._right_node
+        if (
+            _height(right_node._right_node) 
+            < _height(right_node._left_node)
+        ):
+            node._right_node = _rotate_right(right_node)
+        return _rotate_left(node)
+    return node
+
+class BalancedTree:
+    """
+Provides an ordered collection of values, kept in an AVL tree of 
+BalancedTreeNodes so that no path from the root is more than about 
+1.44 * log2(n) nodes long. Values are ordered by key(value), or by 
+the values themselves if no key function is given, and keys are 
+unique: inserting a value with a key that's already present replaces 
+the old value. Lookups take a key, not a value.
+"""
+    def __init__(self, values=(), key=None):
+        self.root = None
+        self.key = key
+        self._size = 0
+        for value in values:
+            self.insert(value)
+
+    def __len__(self):
+        return self._size
+
+    def __contains__(self, key):
+        return self._find(key) != None
+
+    def __iter__(self):
+        return self.range()
+
+    def _key_of(self, value):
+        if self.key == None:
+            return value
+        return self.key(value)
+
+    def _find(self, key):
+        node = self.root
+        while node != None:
+            if key < node.key:
+                node = node._left_node
+            elif node.key < key:
+                node = node._right_node
+            else:
+                return node
+        return None
+
+    def _rebalance_path(self, path:list):
+        # - Working back up from the bottom of the path, each node's 
+        #   sub-tree is rebalanced, and whatever node ends up at its 
+        #   root is re-attached where the original node was
+        for index in range(len(path) - 1, -1, -1):
+            node = path[index]
+            subtree = _rebalanced(node)
+            if subtree is node:
+                continue
+            if index == 0:
+                self.root = subtree
+            elif path[index - 1]._left_node is node:
+                path[index - 1]._left_node = subtree
+            else:
+                path[index - 1]._right_node = subtree
+
+    def insert(self, value):
+        key = self._key_of(value)
+        path = []
+        node = self.root
+        while node != None:
+            path.append(node)
+            if key < node.key:
+                node = node._left_node
+            elif node.key < key:
+                node = node._right_node
+            else:
+                node.data = value
+                return
+        new_node = BalancedTreeNode(value, key)
+        self._size += 1
+        if not path:
+            self.root = new_node
+            return
+        if key < path[-1].key:
+            path[-1]._left_node = new_node
         else:
-            print(' '*(3 * (indent-1)) + '+- %s' % self)
-        if self.left_node:
-            self.left_node.print_tree(indent=indent+1)
-        if self.right_node:
-            self.right_node.print_tree(indent=indent+1)
+            path[-1]._right_node = new_node
+        self._rebalance_path(path)
+
+    def remove(self, key):
+        """
+Removes the value whose key is key, raising KeyError if there is none
+"""
+        path = []
+        node = self.root
+        while node != None and node.key != key:
+            path.append(node)
+            if key < node.key:
+                node = node._left_node
+            else:
+                node = node._right_node
+        if node == None:
+            raise KeyError(key)
+        if node._left_node != None and node._right_node != None:
+            # - A node with two children takes the data and key of 
+            #   the next node in order (the leftmost node of its right 
+            #   sub-tree), which has no left child, and that node is 
+            #   removed instead
+            path.append(node)
+            successor = node._right_node
+            while successor._left_node != None:
+                path.append(successor)
+                successor = successor._left_node
+            node.data = successor.data
+            node.key = successor.key
+            node = successor
+        child = node._left_node
+        if child == None:
+            child = node._right_node
+        if not path:
+            self.root = child
+        elif path[-1]._left_node is node:
+            path[-1]._left_node = child
+        else:
+            path[-1]._right_node = child
+        self._size -= 1
+        self._rebalance_path(path)
+
+    def search(self, key):
+        """
+Returns the value whose key is key, raising KeyError if there is none
+"""
+        node = self._find(key)
+        if node == None:
+            raise KeyError(key)
+        return node.data
+
+    def floor(self, key):
+        """
+Returns the value with the largest key that is less than or equal 
+to key, or None if there is none
+"""
+        result = None
+        node = self.root
+        while node != None:
+            if key < node.key:
+                node = node._left_node
+            elif node.key < key:
+                result = node
+                node = node._right_node
+            else:
+                return node.data
+        if result == None:
+            return None
+        return result.data
+
+    def ceiling(self, key):
+        """
+Returns the value with the smallest key that is greater than or 
+equal to key, or None if there is none
+"""
+        result = None
+        node = self.root
+        while node != None:
+            if node.key < key:
+                node = node._right_node
+            elif key < node.key:
+                result = node
+                node = node._left_node
+            else:
+                return node.data
+        if result == None:
+            return None
+        return result.data
+
+    def range(self, low=None, high=None):
+        """
+Yields the values whose keys are at least low and less than high, 
+in key-order, where a low or high of None leaves that end open
+"""
+        pending = []
+        node = self.root
+        while node != None or pending:
+            # - Sub-trees left of a node whose key is below low can't 
+            #   hold anything in range, so they are never pushed
+            while node != None:
+                if low != None and node.key < low:
+                    node = node._right_node
+                else:
+                    pending.append(node)
+                    node = node._left_node
+            if not pending:
+                return
+            node = pending.pop()
+            if high != None and not node.key < high:
+                return
+            yield node.data
+            node = node._right_node
+
+    def print_tree(self):
+        if self.root != None:
+            self.root.print_tree()
+
+class ArrayTreeNode:
+    """
+Provides a view of one node of an ArrayTree, with the same data, 
+left_node and right_node attributes as a Node, where the children 
+are views too (or None)
+"""
+    __slots__ = ('tree', 'index')
+
+    def __init__(self, tree, index:int):
+        self.tree = tree
+        self.index = index
+
+    @property
+    def data(self):
+        return self.tree[self.index]
+
+    @data.setter
+    def data(self, value):
+        self.tree[self.index] = value
+
+    @property
+    def left_node(self):
+        return self.tree.node(2 * self.index + 1)
+
+    @property
+    def right_node(self):
+        return self.tree.node(2 * self.index + 2)
+
+    def __str__(self):
+        return 'Node(data=%s)' % self.data
+
+class ArrayTree:
+    """
+Provides a complete binary tree (every level full, except the last, 
+which is filled from the left) whose data is kept in one flat list, 
+or in an array of typecode if one is given, in breadth-first order, 
+so that the children of the node at index i are at 2i+1 and 2i+2 
+and no node objects are kept at all. Values can only be appended 
+to (or popped from) the end, which keeps the tree complete.
+"""
+    def __init__(self, values=(), typecode=None):
+        self.typecode = typecode
+        if typecode == None:
+            self._data = list(values)
+        else:
+            self._data = array(typecode, values)
+
+    def __len__(self):
+        return len(self._data)
+
+    def __getitem__(self, index:int):
+        return self._data[index]
+
+    def __setitem__(self, index:int, value):
+        self._data[index] = value
+
+    def append(self, value):
+        self._data.append(value)
+
+    def pop(self):
+        return self._data.pop()
+
+    @property
+    def root(self):
+        return self.node(0)
+
+    def node(self, index:int):
+        """
+Returns an ArrayTreeNode view of the node at index, or None if 
+there isn't one
+"""
+        if index >= len(self._data):
+            return None
+        return ArrayTreeNode(self, index)
+
+    # - The traversals work on indexes, with the same explicit stacks 
+    #   as Node's, and only create a view for each node yielded
+
+    def _pre_order_indexes(self):
+        size = len(self._data)
+        pending = [0] if size else []
+        while pending:
+            index = pending.pop()
+            yield index
+            if 2 * index + 2 < size:
+                pending.append(2 * index + 2)
+            if 2 * index + 1 < size:
+                pending.append(2 * index + 1)
+
+    def _in_order_indexes(self):
+        size = len(self._data)
+        pending = []
+        index = 0
+        while index < size or pending:
+            while index < size:
+                pending.append(index)
+                index = 2 * index + 1
+            index = pending.pop()
+            yield index
+            index = 2 * index + 2
+
+    def _post_order_indexes(self):
+        size = len(self._data)
+        pending = []
+        index = 0
+        last_index = None
+        while index < size or pending:
+            if index < size:
+                pending.append(index)
+                index = 2 * index + 1
+                continue
+            right_index = 2 * pending[-1] + 2
+            if right_index < size and right_index != last_index:
+                index = right_index
+            else:
+                last_index = pending.pop()
+                yield last_index
+
+    def pre_order(self):
+        return (
+            ArrayTreeNode(self, i) for i in self._pre_order_indexes()
+        )
+
+    def in_order(self):
+        return (
+            ArrayTreeNode(self, i) for i in self._in_order_indexes()
+        )
+
+    def post_order(self):
+        return (
+            ArrayTreeNode(self, i) for i in self._post_order_indexes()
+        )
+
+    def breadth_first(self):
+        return (ArrayTreeNode(self, i) for i in range(len(self._data)))
 
     def traverse(self):
-        yield self
-        if self.left_node:
-            for node in self.left_node.traverse():
-                yield node
-        if self.right_node:
-            for node in self.right_node.traverse():
-                yield node
+        return self.pre_order()
 
     def __iter__(self):
-        return self.__next__()
+        return self.pre_order()
+
+    def print_tree(self):
+        # - A node's depth is the number of times its index (plus one) 
+        #   can be halved before it reaches the root's index (plus one)
+        for index in self._pre_order_indexes():
+            indent = (index + 1).bit_length() - 1
+            if not indent:
+                print('Node(data=%s)' % self._data[index])
+            else:
+                print(
+                    ' '*(3 * (indent-1)) + '+- Node(data=%s)' % 
+                    self._data[index]
+                )
+
+    @classmethod
+    def from_node(cls, root, typecode=None):
+        """
+Creates an ArrayTree from the tree of Nodes under root, raising 
+ValueError if that tree isn't complete
+"""
+        tree = cls(typecode=typecode)
+        pending = deque([root])
+        finished = False
+        while pending:
+            node = pending.popleft()
+            if node == None:
+                finished = True
+                continue
+            if finished:
+                raise ValueError(
+                    '%s.from_node expects a complete tree, but Node '
+                    '"%s" comes after a missing node' % 
+                    (cls.__name__, node.data)
+                )
+            tree.append(node.data)
+            pending.append(node.left_node)
+            pending.append(node.right_node)
+        return tree
+
+    def to_node(self, node_class=Node):
+        """
+Returns the root of a tree of node_class instances with the same 
+shape and data, or None if this tree is empty
+"""
+        nodes = [node_class(data) for data in self._data]
+        for index in range(1, len(nodes)):
+            if index % 2:
+                nodes[(index - 1) // 2]._left_node = nodes[index]
+            else:
+                nodes[(index - 1) // 2]._right_node = nodes[index]
+        if not nodes:
+            return None
+        return nodes[0]
+
+def benchmark_pickling(size=1000000):
+    """
+Reports the pickled size, and the time taken to pickle, unpickle 
+and deep-copy, a tree of Nodes that is size levels deep
+"""
+    print('Pickling benchmark (%d nodes, %d deep)' % (size, size))
+    root = current_node = Node(0)
+    for data in range(1, size):
+        current_node.left_node = Node(data)
+        current_node = current_node.left_node
+    start = perf_counter()
+    pickled = pickle.dumps(root, pickle.HIGHEST_PROTOCOL)
+    dumped = perf_counter() - start
+    start = perf_counter()
+    pickle.loads(pickled)
+    loaded = perf_counter() - start
+    start = perf_counter()
+    deepcopy(root)
+    copied = perf_counter() - start
+    print(
+        '+- %d bytes, dumps %.3fs, loads %.3fs, deepcopy %.3fs' % 
+        (len(pickled), dumped, loaded, copied)
+    )
+
+def benchmark_balanced_tree(size=1000000, operations=100000):
+    """
+Compares a BalancedTree of size keys with a sorted list searched 
+with bisect, for building, for operations lookups and floor 
+searches, and for operations // 10 inserts and removals
+"""
+    print('BalancedTree vs. bisect benchmark (%d keys)' % size)
+    keys = list(range(0, size * 2, 2))
+    shuffle(keys)
+    start = perf_counter()
+    tree = BalancedTree(keys)
+    tree_build = perf_counter() - start
+    start = perf_counter()
+    sorted_keys = sorted(keys)
+    list_build = perf_counter() - start
+    print(
+        '+- build: tree %.3fs (height %d), sorted() %.3fs' % 
+        (tree_build, tree.root.height, list_build)
+    )
+    probes = [randrange(size * 2) for i in range(operations)]
+    start = perf_counter()
+    for probe in probes:
+        tree.floor(probe)
+    tree_time = perf_counter() - start
+    start = perf_counter()
+    for probe in probes:
+        sorted_keys[bisect_right(sorted_keys, probe) - 1]
+    list_time = perf_counter() - start
+    print(
+        '+- %d floor searches: tree %.3fs, bisect %.3fs' % 
+        (operations, tree_time, list_time)
+    )
+    # - Odd numbers aren't in either structure yet
+    changes = [probe | 1 for probe in probes[:operations // 10]]
+    changes = list(dict.fromkeys(changes))
+    start = perf_counter()
+    for change in changes:
+        tree.insert(change)
+    for change in changes:
+        tree.remove(change)
+    tree_time = perf_counter() - start
+    start = perf_counter()
+    for change in changes:
+        sorted_keys.insert(bisect_left(sorted_keys, change), change)
+    for change in changes:
+        del sorted_keys[bisect_left(sorted_keys, change)]
+    list_time = perf_counter() - start
+    print(
+        '+- %d inserts + removals: tree %.3fs, list %.3fs' % 
+        (len(changes), tree_time, list_time)
+    )
+
+def _balanced_nodes(size:int, node_class=Node):
+    """
+Returns the root of a complete tree of size node_class instances, 
+linked by level
+"""
+    nodes = [node_class(data) for data in range(size)]
+    for index in range(1, size):
+        if index % 2:
+            nodes[(index - 1) // 2].left_node = nodes[index]
+        else:
+            nodes[(index - 1) // 2].right_node = nodes[index]
+    return nodes[0]
 
-    def __next__(self):
-        yield self
-        if self.left_node:
-            yield from self.left_node
-        if self.right_node:
-            yield from self.right_node
-        raise StopIteration
+def benchmark_traversal(depth=100000, size=10000000):
+    """
+Reports nodes per second for each traversal order, over a 
+degenerate tree that is depth Nodes deep, and a balanced tree of 
+size Nodes
+"""
+    root = current_node = Node(0)
+    for data in range(1, depth):
+        current_node.left_node = Node(data)
+        current_node = current_node.left_node
+    trees = [('%d deep' % depth, depth, root)]
+    del root, current_node
+    trees.append(('%d balanced' % size, size, _balanced_nodes(size)))
+    for name, count, root in trees:
+        print('Traversal benchmark (%s)' % name)
+        for order in (
+            'pre_order', 'in_order', 'post_order', 'breadth_first'
+        ):
+            start = perf_counter()
+            for node in getattr(root, order)():
+                pass
+            elapsed = perf_counter() - start
+            print(
+                '+- %-13s %.3fs (%d nodes/sec)' % 
+                (order, elapsed, count / elapsed)
+            )
+
+def benchmark_nodes(size=1000000):
+    """
+Reports, for Node and SlottedNode, the memory used per node, and 
+the nodes per second for building a balanced tree of size nodes 
+(with and without checking child-node types), reading their 
+left_node and right_node attributes, and traversing them
+"""
+    for node_class in (Node, SlottedNode):
+        print(
+            '%s benchmark (%d nodes)' % (node_class.__name__, size)
+        )
+        for check_types in (True, False):
+            node_class.check_types = check_types
+            root = None
+            tracemalloc.start()
+            start = perf_counter()
+            root = _balanced_nodes(size, node_class)
+            elapsed = perf_counter() - start
+            used = tracemalloc.get_traced_memory()[0]
+            tracemalloc.stop()
+            print(
+                '+- build (check_types=%s) %d nodes/sec, '
+                '%.1f bytes/node' % 
+                (check_types, size / elapsed, used / size)
+            )
+        node_class.check_types = True
+        nodes = list(root.pre_order())
+        start = perf_counter()
+        for node in nodes:
+            node.left_node
+            node.right_node
+        elapsed = perf_counter() - start
+        print('+- child-node reads %d nodes/sec' % (size / elapsed))
+        start = perf_counter()
+        for node in root.pre_order():
+            pass
+        elapsed = perf_counter() - start
+        print('+- pre_order traversal %d nodes/sec' % (size / elapsed))
+        del nodes, root
+
+def benchmark_array_tree(size=10000000):
+    """
+Reports the memory used by, and the time taken to build and 
+traverse, an ArrayTree of size integers, alongside a tree of Nodes 
+a tenth of that size
+"""
+    print('ArrayTree benchmark (%d nodes)' % size)
+    tracemalloc.start()
+    start = perf_counter()
+    tree = ArrayTree(range(size), typecode='q')
+    elapsed = perf_counter() - start
+    used = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    print(
+        '+- build %.3fs, %.1f MB (%.1f bytes/node)' % 
+        (elapsed, used / 2**20, used / size)
+    )
+    start = perf_counter()
+    for index in tree._pre_order_indexes():
+        pass
+    elapsed = perf_counter() - start
+    print('+- pre-order indexes %d nodes/sec' % (size / elapsed))
+    start = perf_counter()
+    for node in tree.pre_order():
+        node.data
+    elapsed = perf_counter() - start
+    print('+- pre-order data %d nodes/sec' % (size / elapsed))
+    del tree
+    tracemalloc.start()
+    root = _balanced_nodes(size // 10)
+    used = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    print(
+        '+- Nodes (%d of them) %.1f bytes/node' % 
+        (size // 10, used / (size // 10))
+    )
+
+def benchmark_serializing(depth=100000, size=1000000):
+    """
+Reports the size of, and the time taken to write and read, the JSON 
+and binary encodings of a degenerate tree that is depth Nodes deep, 
+and a balanced tree of size Nodes
+"""
+    root = current_node = Node(0)
+    for data in range(1, depth):
+        current_node.left_node = Node(data)
+        current_node = current_node.left_node
+    trees = [('%d deep' % depth, root)]
+    del root, current_node
+    trees.append(('%d balanced' % size, _balanced_nodes(size)))
+    for name, root in trees:
+        print('Serializing benchmark (%s)' % name)
+        for encoding, stream_class in (
+            ('json', io.StringIO), ('binary', io.BytesIO)
+        ):
+            stream = stream_class()
+            start = perf_counter()
+            getattr(root, 'to_%s' % encoding)(stream)
+            dumped = perf_counter() - start
+            stream.seek(0)
+            start = perf_counter()
+            getattr(Node, 'from_%s' % encoding)(stream)
+            loaded = perf_counter() - start
+            print(
+                '+- %-6s %d bytes, write %.3fs, read %.3fs' % 
+                (encoding, len(stream.getvalue()), dumped, loaded)
+            )
 
 if __name__ == '__main__':
     my_tree = Node('Root',
@@ -155,6 +1303,51 @@ if __name__ == '__main__':
     print(my_tree.right_node)
     print(my_tree.right_node.right_node)
 
+    print('\n### traversal orders')
+    for order in (
+        'pre_order', 'in_order', 'post_order', 'breadth_first'
+    ):
+        nodes = getattr(my_tree, order)()
+        print('%-13s %s' % (order, ' '.join(n.data for n in nodes)))
+
+    print('\n### pickling and copying a tree')
+    copied_tree = pickle.loads(pickle.dumps(my_tree))
+    copied_tree.print_tree()
+    copied_tree = deepcopy(my_tree)
+    print(copied_tree.left_node.right_node.right_node)
+
+    print('\n### an ordered, self-balancing tree')
+    words = BalancedTree(
+        ['pear', 'Apple', 'fig', 'Cherry', 'banana', 'date'], 
+        key=str.lower
+    )
+    words.root.print_tree()
+    print(list(words))
+    print(words.floor('c'), words.ceiling('c'), 'fig' in words)
+    words.remove('banana')
+    print(list(words.range('b', 'f')))
+
+    print('\n### an array-backed complete tree')
+    my_array_tree = ArrayTree('ABCDEF')
+    my_array_tree.print_tree()
+    print(' '.join(node.data for node in my_array_tree.in_order()))
+    print(my_array_tree.root.left_node.right_node)
+    converted = my_array_tree.to_node()
+    converted = ArrayTree.from_node(converted)
+    print([node.data for node in converted.breadth_first()])
+    try:
+        ArrayTree.from_node(my_tree)
+    except ValueError as error:
+        print(error)
+
+    if '--benchmark' in sys.argv:
+        benchmark_pickling()
+        benchmark_balanced_tree()
+        benchmark_traversal()
+        benchmark_nodes()
+        benchmark_array_tree()
+        benchmark_serializing()
+
 # 'left':{'value':'L01', 'left':{}, 'right':{},},
 # 'right':{'value':'R01', 'left':{}, 'right':{},},
 
@@ -177,5 +1370,18 @@ example_as_dict = {
     }
 }
 
-import json
 print(json.dumps(example_as_dict, indent=4).replace('"', "'"))
+
+if __name__ == '__main__':
+    print('\n### streaming to and from the example_as_dict layout')
+    dict_tree = Node.from_json(io.StringIO(json.dumps(example_as_dict)))
+    dict_tree.print_tree()
+    stream = io.StringIO()
+    dict_tree.to_json(stream)
+    print(stream.getvalue())
+    print(json.loads(stream.getvalue()) == example_as_dict)
+    stream = io.BytesIO()
+    dict_tree.to_binary(stream)
+    print('%d bytes in binary' % len(stream.getvalue()))
+    stream.seek(0)
+    Node.from_binary(stream).print_tree()